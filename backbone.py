@@ -0,0 +1,79 @@
+from pysat.solvers import Solver
+
+def compute_backbone(cnf, variables):
+    """
+    Find the variables that take the same value in every model.
+
+    One incremental solver is kept for the whole run. Every variable starts
+    as a candidate with its value in a first model; a candidate is tested by
+    solving under the assumption that it takes the opposite value. A model
+    found that way rules out every other candidate it also flips, so most
+    variables never need a call of their own. Proven backbone literals are
+    added as unit clauses to speed up the remaining calls.
+
+    Args:
+        cnf: Clauses (pysat CNF or list of clauses)
+        variables: Variables to analyse (e.g. the cell variables)
+
+    Returns:
+        Dictionary var -> forced value (True = trap), or None if the CNF is
+        unsatisfiable
+    """
+    with Solver(bootstrap_with=cnf.clauses if hasattr(cnf, "clauses") else cnf) as solver:
+        return solver_backbone(solver, variables)
+
+def solver_backbone(solver, variables, known=None):
+    """
+    compute_backbone on a live solver, which is left with the backbone
+    literals added as unit clauses. Variables in `known` (var -> value,
+    proven earlier on a weaker formula) are not tested again.
+    """
+    if not solver.solve():
+        return None
+    model = solver.get_model()
+    # Variables the solver never saw occur in no clause and are free
+    value = {abs(lit): lit > 0 for lit in model}
+    backbone = dict(known or {})
+    candidates = {var for var in variables if var in value and var not in backbone}
+
+    while candidates:
+        var = candidates.pop()
+        lit = var if value[var] else -var
+        if solver.solve(assumptions=[-lit]):
+            agrees = set(solver.get_model())
+            candidates = {v for v in candidates if (v if value[v] else -v) in agrees}
+        else:
+            backbone[var] = value[var]
+            solver.add_clause([lit])
+    return backbone
+
+def forced_cells(grid, variables, cnf):
+    """
+    Map every unknown cell to 'T' or 'G' when all solutions agree on it, or
+    '?' when it is free. Returns None for an unsolvable board.
+    """
+    backbone = compute_backbone(cnf, variables.values())
+    if backbone is None:
+        return None
+    return cell_marks(grid, variables, backbone)
+
+def cell_marks(grid, variables, backbone):
+    cells = {}
+    for cell, var in variables.items():
+        if grid[cell[0]][cell[1]].isdigit():
+            continue
+        if var in backbone:
+            cells[cell] = 'T' if backbone[var] else 'G'
+        else:
+            cells[cell] = '?'
+    return cells
+
+def render_forced_map(grid, cells):
+    """Grid in interpret_model's format with forced cells as T/G and free ones as '?'."""
+    result = []
+    for i in range(len(grid)):
+        row = []
+        for j in range(len(grid[0])):
+            row.append(grid[i][j] if grid[i][j].isdigit() else cells[(i, j)])
+        result.append(row)
+    return result
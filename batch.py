@@ -0,0 +1,171 @@
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from time import time
+
+from cnf_generator import generate_cnf
+from solvers import REGISTRY, pick_solver, run
+from utils import interpret_model, write_output_file, read_input_file, assign_variables, solver_variables
+
+# Registered solvers plus "auto", which picks one per board by formula size
+SOLVER_NAMES = tuple(REGISTRY) + ("auto",)
+
+def find_inputs(pattern):
+    """Expand a directory (its input_*.txt files) or a glob pattern."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "input_*.txt")
+    return sorted(glob.glob(pattern))
+
+def output_path_for(input_path, out_dir=None):
+    directory, name = os.path.split(input_path)
+    if name.startswith("input_"):
+        name = "output_" + name[len("input_"):]
+    else:
+        name = "output_" + name
+    return os.path.join(out_dir if out_dir is not None else directory, name)
+
+def solve_file(input_path, output_path, solver_names, preprocessing=False):
+    """
+    Parse a board and build its CNF once (simplified first with
+    preprocessing), then run every requested solver on it. The first
+    solution found is written to output_path.
+
+    Returns: JSON-serialisable record with per-stage and per-solver timings
+    """
+    record = {"input": input_path, "output": None, "status": "unsolved", "solvers": {}}
+    try:
+        start = time()
+        grid = read_input_file(input_path)
+        variables = assign_variables(grid)
+        record["parse_seconds"] = time() - start
+
+        cnf = None
+        if any(name == "auto" or REGISTRY[name].kind == "cnf" for name in solver_names):
+            start = time()
+            cnf = generate_cnf(grid, variables)
+            record["cnf_seconds"] = time() - start
+            record["clauses"] = len(cnf.clauses)
+        record["variables"] = len(variables)
+
+        decision = solver_variables(variables, cnf) if cnf is not None else None
+        fixed = None
+        if cnf is not None and preprocessing:
+            from preprocess import preprocess, free_variables, merge_model
+            start = time()
+            cnf, fixed, report = preprocess(cnf)
+            report["seconds"] = time() - start
+            record["preprocess"] = report
+            if cnf is not None:
+                remaining = free_variables(cnf)
+                decision = [var for var in decision if var in remaining]
+
+        for name in solver_names:
+            start = time()
+            picked = None
+            if name != "auto" and decision is not None and not REGISTRY[name].fits(len(decision)):
+                record["solvers"][name] = {"status": "skipped", "variables": len(decision)}
+                continue
+            try:
+                cnf_solver = name == "auto" or REGISTRY[name].kind == "cnf"
+                if cnf_solver and cnf is None:
+                    # Preprocessing proved the board unsatisfiable
+                    model = None
+                else:
+                    if name == "auto":
+                        picked = pick_solver(len(decision))
+                    model = run(picked or name, grid, variables, cnf, decision)
+                    if model is not None and cnf_solver and fixed:
+                        model = merge_model(model, fixed)
+                status = "solved" if model is not None else "unsat"
+            except Exception as e:
+                model, status = None, f"error: {e}"
+            result = {"status": status, "seconds": time() - start}
+            if picked is not None:
+                result["picked"] = picked
+            record["solvers"][name] = result
+
+            if model is not None and record["output"] is None:
+                start = time()
+                write_output_file(output_path, interpret_model(grid, variables, model))
+                result["write_seconds"] = time() - start
+                record["output"] = output_path
+                record["status"] = "solved"
+            elif status == "unsat" and record["status"] == "unsolved":
+                record["status"] = "unsat"
+    except Exception as e:
+        record["status"] = f"error: {e}"
+    return record
+
+def run_batch(inputs, solver_names, results_path, jobs=None, max_in_flight=None, out_dir=None,
+              preprocessing=False):
+    """
+    Solve many boards in a process pool, keeping at most max_in_flight
+    files queued or running. A JSONL record is appended to results_path as
+    each file finishes.
+
+    Returns: Summary counts by status
+    """
+    jobs = jobs or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * jobs
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    summary = {}
+    start = time()
+    with open(results_path, "w") as results, ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = set()
+        remaining = iter(inputs)
+
+        def record_done(done):
+            for future in done:
+                record = future.result()
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+                status = record["status"].split(":")[0]
+                summary[status] = summary.get(status, 0) + 1
+
+        for input_path in remaining:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                record_done(done)
+            pending.add(executor.submit(solve_file, input_path,
+                                        output_path_for(input_path, out_dir), solver_names, preprocessing))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            record_done(done)
+
+    summary["seconds"] = time() - start
+    return summary
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="main.py --batch",
+                                     description="Solve a directory or glob of input files.")
+    parser.add_argument("inputs", help="Directory of input_*.txt files or a glob pattern")
+    parser.add_argument("--solvers", default="pysat",
+                        help=f"Comma-separated solvers to run ({', '.join(SOLVER_NAMES)})")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Files queued or running at once (default: 2 * jobs)")
+    parser.add_argument("--results", default="results.jsonl", help="JSONL results file")
+    parser.add_argument("--out-dir", default=None, help="Directory for outputs (default: next to inputs)")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="Simplify each CNF (unit propagation, subsumption) before solving")
+    args = parser.parse_args(argv)
+
+    solver_names = [name.strip() for name in args.solvers.split(",") if name.strip()]
+    unknown = [name for name in solver_names if name not in SOLVER_NAMES]
+    if unknown:
+        parser.error(f"unknown solver(s): {', '.join(unknown)}")
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        parser.error(f"no input files match {args.inputs}")
+
+    summary = run_batch(inputs, solver_names, args.results, args.jobs, args.max_in_flight, args.out_dir,
+                        args.preprocess)
+    seconds = summary.pop("seconds")
+    counts = ", ".join(f"{count} {status}" for status, count in sorted(summary.items()))
+    print(f"Processed {len(inputs)} files in {seconds:.2f} seconds: {counts}")
+    print(f"Results written to {args.results}")
@@ -0,0 +1,188 @@
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+from solvers import REGISTRY, SOLVER_NAMES, pick_solver, run
+from cnf_generator import generate_cnf
+from puzzle_generator import generate_puzzle
+from utils import interpret_model, write_output_file, read_input_file, assign_variables, solver_variables
+
+FIELDS = ["rows", "cols", "density", "hidden", "seed", "stage", "status", "repeats",
+          "min", "median", "mean", "stdev", "peak_kib", "variables", "clauses", "picked"]
+
+def measure(func, warmup, repeats):
+    """
+    Time func() after `warmup` untimed calls, then record its peak traced
+    memory in one extra run (tracemalloc slows the code, so it is kept out
+    of the timed runs).
+
+    Returns: (timing stats dict, result of the last call)
+    """
+    result = None
+    for _ in range(warmup):
+        result = func()
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        result = func()
+        times.append(perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = {
+        "repeats": repeats,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "peak_kib": peak / 1024,
+    }
+    return stats, result
+
+def bench_board(rows, cols, density, hidden, seed, solver_names, warmup, repeats, encoding):
+    """Time every pipeline stage on one seeded board."""
+    base = {"rows": rows, "cols": cols, "density": density, "hidden": hidden, "seed": seed}
+    puzzle = generate_puzzle(rows, cols, int(rows * cols * hidden), density, rng=random.Random(seed))
+    if puzzle is None:
+        return [dict(base, stage="generate", status="failed")]
+    grid, _ = puzzle
+
+    records = []
+
+    def record(stage, stats, **extra):
+        records.append(dict(base, stage=stage, status="ok", **stats, **extra))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "input.txt")
+        output_path = os.path.join(tmp, "output.txt")
+        write_output_file(input_path, grid)
+
+        stats, grid = measure(lambda: read_input_file(input_path), warmup, repeats)
+        record("read_input_file", stats)
+        stats, variables = measure(lambda: assign_variables(grid), warmup, repeats)
+        record("assign_variables", stats, variables=len(variables))
+        stats, cnf = measure(lambda: generate_cnf(grid, variables, encoding), warmup, repeats)
+        record("generate_cnf", stats, variables=cnf.nv, clauses=len(cnf.clauses))
+
+        decision_vars = solver_variables(variables, cnf)
+        model = None
+        for name in solver_names:
+            stage = f"solve:{name}"
+            extra = {}
+            if name == "auto":
+                name = extra["picked"] = pick_solver(len(decision_vars))
+            entry = REGISTRY[name]
+            if not entry.fits(len(decision_vars)):
+                records.append(dict(base, stage=stage, status="skipped", variables=len(decision_vars)))
+                continue
+            stats, result = measure(lambda: run(name, grid, variables, cnf, decision_vars), warmup, repeats)
+            record(stage, stats, variables=len(decision_vars), clauses=len(cnf.clauses), **extra)
+            if result is None:
+                records[-1]["status"] = "unsat"
+            model = model or result
+
+        if model is not None:
+            stats, output = measure(lambda: interpret_model(grid, variables, model), warmup, repeats)
+            record("interpret_model", stats)
+            stats, _ = measure(lambda: write_output_file(output_path, output), warmup, repeats)
+            record("write_output_file", stats)
+    return records
+
+def compare(records, baseline, tolerance):
+    """
+    Compare medians against a baseline run.
+
+    Returns: List of (key, baseline median, current median) for stages that
+    got slower by more than `tolerance` (e.g. 0.25 = 25%)
+    """
+    def key(r):
+        return (r["rows"], r["cols"], r["density"], r["hidden"], r["seed"], r["stage"])
+
+    previous = {key(r): r for r in baseline if r.get("median") is not None}
+    regressions = []
+    for r in records:
+        old = previous.get(key(r))
+        if old is None or r.get("median") is None:
+            continue
+        if r["median"] > old["median"] * (1 + tolerance):
+            regressions.append((key(r), old["median"], r["median"]))
+    return regressions
+
+def write_csv(path, records):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+
+def parse_list(text, kind):
+    return [kind(x) for x in text.split(",") if x.strip()]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on seeded boards.")
+    parser.add_argument("--sizes", default="5,10,20,40", help="Comma-separated square board sizes")
+    parser.add_argument("--densities", default="0.15,0.25", help="Comma-separated trap probabilities")
+    parser.add_argument("--hidden", default="0.0,0.2", help="Comma-separated hidden-number ratios")
+    parser.add_argument("--seeds", default="0", help="Comma-separated board seeds")
+    parser.add_argument("--solvers", default="pysat,backtracking,deduction",
+                        help=f"Comma-separated solvers ({', '.join(SOLVER_NAMES)}, auto)")
+    parser.add_argument("--encoding", default="auto", help="Cardinality encoding for generate_cnf")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", default="bench_results.json", help="JSON output path")
+    parser.add_argument("--csv", default=None, help="Optional CSV output path")
+    parser.add_argument("--baseline", default=None, help="Earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed median slowdown before a stage counts as a regression")
+    args = parser.parse_args(argv)
+
+    solver_names = parse_list(args.solvers, str)
+    unknown = [name for name in solver_names if name not in SOLVER_NAMES + ("auto",)]
+    if unknown:
+        parser.error(f"unknown solver(s): {', '.join(unknown)}")
+
+    records = []
+    for size in parse_list(args.sizes, int):
+        for density in parse_list(args.densities, float):
+            for hidden in parse_list(args.hidden, float):
+                for seed in parse_list(args.seeds, int):
+                    board = bench_board(size, size, density, hidden, seed, solver_names,
+                                        args.warmup, args.repeats, args.encoding)
+                    for r in board:
+                        if r.get("median") is not None:
+                            print(f"{size}x{size} p={density} hidden={hidden} seed={seed} "
+                                  f"{r['stage']:<20} median {r['median'] * 1000:9.3f} ms  "
+                                  f"peak {r['peak_kib']:9.1f} KiB")
+                        else:
+                            print(f"{size}x{size} p={density} hidden={hidden} seed={seed} "
+                                  f"{r['stage']:<20} {r['status']}")
+                    records.extend(board)
+
+    with open(args.json, "w") as f:
+        json.dump(records, f, indent=1)
+    print(f"Results written to {args.json}")
+    if args.csv:
+        write_csv(args.csv, records)
+        print(f"Results written to {args.csv}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old * 1000:.3f} ms -> {new * 1000:.3f} ms")
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
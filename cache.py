@@ -0,0 +1,146 @@
+import hashlib
+import os
+from array import array
+
+DEFAULT_CACHE_DIR = ".gemhunter_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bump when the CNF generator's output for a given grid changes
+FORMAT_VERSION = 1
+
+class CNFCache:
+    """
+    Content-addressed on-disk cache for generated CNFs and solver models.
+
+    Entries are keyed by a hash of the normalized grid, the variable mapping
+    and the encoding settings. CNFs are stored as a flat int32 literal
+    array with 0 terminating each clause (the DIMACS body without text);
+    models as int32 literal arrays. Reads refresh a file's mtime, and
+    writes evict the least recently used files once the directory grows
+    past max_bytes.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = {"cnf": 0, "model": 0}
+        self.misses = {"cnf": 0, "model": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, grid, variables, encoding):
+        digest = hashlib.sha256()
+        digest.update(f"v{FORMAT_VERSION};encoding={encoding};".encode())
+        if hasattr(grid, "tobytes"):
+            digest.update(f"array{grid.shape};".encode())
+            digest.update(grid.tobytes())
+        else:
+            for row in grid:
+                digest.update(",".join(cell.strip() for cell in row).encode())
+                digest.update(b"\n")
+        mapping = array("i")
+        for (i, j), var in variables.items():
+            mapping.extend((i, j, var))
+        digest.update(mapping.tobytes())
+        return digest.hexdigest()
+
+    def stats(self):
+        return {"hits": dict(self.hits), "misses": dict(self.misses)}
+
+    @staticmethod
+    def _model_name(key, solver_name):
+        safe = "".join(c if c.isalnum() else "_" for c in solver_name)
+        return f"{key}.{safe}.model"
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, kind, name, valid):
+        # A missing, truncated or otherwise corrupt entry is a miss; corrupt
+        # files are removed so the next write replaces them
+        path = self._path(name)
+        data = array("i")
+        try:
+            with open(path, "rb") as f:
+                data.frombytes(f.read())
+            os.utime(path)
+        except OSError:
+            data = None
+        except ValueError:
+            # Not a whole number of int32 values
+            data = array("i")
+        if data is not None and not valid(data):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            data = None
+        if data is None:
+            self.misses[kind] += 1
+            return None
+        self.hits[kind] += 1
+        return data
+
+    def _write(self, name, data):
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            data.tofile(f)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def get_cnf(self, key):
+        from pysat.formula import CNF
+
+        # nv, then clauses each terminated by 0
+        data = self._read("cnf", f"{key}.cnf",
+                          lambda data: len(data) >= 1 and data[0] >= 0 and (len(data) == 1 or data[-1] == 0))
+        if data is None:
+            return None
+        cnf = CNF()
+        cnf.nv = data[0]
+        clause = []
+        for lit in data[1:]:
+            if lit == 0:
+                cnf.clauses.append(clause)
+                clause = []
+            else:
+                clause.append(lit)
+        return cnf
+
+    def put_cnf(self, key, cnf):
+        data = array("i", [cnf.nv])
+        for clause in cnf.clauses:
+            data.extend(clause)
+            data.append(0)
+        self._write(f"{key}.cnf", data)
+
+    def get_model(self, key, solver_name):
+        """Returns (found, model); model is None for a cached unsat result."""
+        # 0 for unsat, or 1 followed by the model
+        data = self._read("model", self._model_name(key, solver_name),
+                          lambda data: len(data) >= 1 and (data[0] == 1 or (data[0] == 0 and len(data) == 1)))
+        if data is None:
+            return False, None
+        return True, (list(data[1:]) if data[0] else None)
+
+    def put_model(self, key, solver_name, model):
+        data = array("i", [0] if model is None else [1] + list(model))
+        self._write(self._model_name(key, solver_name), data)
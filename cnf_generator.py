@@ -1,79 +1,331 @@
-from utils import get_neighbors
+from utils import get_neighbors, VariablePool
 import itertools
-from pysat.formula import CNF
+from math import comb
+import numpy as np
 
-def generate_cnf(grid, variables):
+# Encodings implemented in this module
+NATIVE_ENCODINGS = ("combinations", "seqcounter", "totalizer")
+
+# Encodings delegated to pysat.card (name -> pysat.card.EncType attribute)
+PYSAT_ENCODINGS = {
+    "cardnetwork": "cardnetwrk",
+    "sortnetwork": "sortnetwrk",
+    "pysat-seqcounter": "seqcounter",
+    "pysat-totalizer": "totalizer",
+    "pysat-mtotalizer": "mtotalizer",
+    "pysat-kmtotalizer": "kmtotalizer",
+}
+
+ENCODINGS = ("auto",) + NATIVE_ENCODINGS + tuple(PYSAT_ENCODINGS)
+
+def generate_cnf(grid, variables, encoding="auto", pool=None, cells=None, selectors=None, cache=None, stream=False):
     """
     Generate CNF clauses for the Gem Hunter game.
-    
+
     Args:
-        grid: 2D grid where each cell contains a digit, '_', or '*'
-        variables: Dictionary mapping cell coordinates to variable IDs
-    
+        grid: 2D grid where each cell contains a digit, '_', or '*', or an
+            int8 grid from read_grid_array
+        variables: Dictionary mapping cell coordinates to variable IDs; cells
+            missing from it are treated as known non-traps
+        encoding: Cardinality encoding for the number cells (see ENCODINGS);
+            "auto" picks the smallest one for each cell's n and k
+        pool: VariablePool shared with assign_variables; auxiliary variables
+            are allocated from it (a pool above the cell variables is created
+            if omitted)
+        cells: Optional iterable of number cells to encode; by default every
+            digit in the grid is encoded
+        selectors: Optional dictionary mapping number cells to selector
+            variables; every clause of such a cell is guarded by its selector,
+            so the cell only constrains the board while the selector is True
+        cache: Optional CNFCache consulted for whole-board formulas (no pool,
+            cells or selectors given)
+        stream: Return a generator of clauses (see iter_cnf) instead of a
+            materialized CNF; the cache is not used
+
     Returns:
         CNF object containing all constraints
     """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}. Choose from {', '.join(ENCODINGS)}.")
+    if stream:
+        return iter_cnf(grid, variables, encoding, pool, cells, selectors)
+
+    cache_key = None
+    if cache is not None and pool is None and cells is None and selectors is None:
+        cache_key = cache.key(grid, variables, encoding)
+        cached = cache.get_cnf(cache_key)
+        if cached is not None:
+            return cached
+
+    # Imported here so importing this module does not load pysat
+    from pysat.formula import CNF
     cnf = CNF()
-    rows, cols = len(grid), len(grid[0])
-    
-    # CRITICAL FIX: Add constraints for cells that MUST be numbers
-    # These are FIXED cells and not part of the solution variables
-    for i in range(rows):
-        for j in range(cols):
-            if grid[i][j].isdigit():
-                # This cell must remain a number - force its variable to be False
-                # (not a trap, which would be True)
-                cnf.append([-variables[(i, j)]])
-    
-    # For each cell with a number, add constraints for its neighbors
-    for i in range(rows):
-        for j in range(cols):
-            if grid[i][j].isdigit():
-                k = int(grid[i][j])
-                neighbors = get_neighbors(i, j, rows, cols)
-                neighbor_vars = [variables[(x, y)] for x, y in neighbors]
-                
-                # Generate constraints for "exactly k neighbors are traps"
-                add_exactly_k_constraints(cnf, neighbor_vars, k)
-    
+    for band in iter_cnf_rows(grid, variables, encoding, pool, cells, selectors):
+        for clause in band:
+            cnf.append(clause)
+
+    if cache_key is not None:
+        cache.put_cnf(cache_key, cnf)
     return cnf
 
-def add_exactly_k_constraints(cnf, variables, k):
+def iter_cnf(grid, variables, encoding="auto", pool=None, cells=None, selectors=None):
+    """
+    Yield the clauses of generate_cnf one at a time, a row band at a time.
+
+    Only the clauses of the current row of number cells are held in memory,
+    so the stream can be fed to Solver.add_clause or write_dimacs without
+    materializing the whole formula.
+    """
+    for band in iter_cnf_rows(grid, variables, encoding, pool, cells, selectors):
+        yield from band
+
+def iter_cnf_rows(grid, variables, encoding="auto", pool=None, cells=None, selectors=None):
+    """
+    Yield one list of clauses per grid row that holds number cells to encode.
+    Arguments are as for generate_cnf.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}. Choose from {', '.join(ENCODINGS)}.")
+    if pool is None:
+        pool = VariablePool(max(variables.values(), default=0))
+    rows, cols = len(grid), len(grid[0])
+
+    if cells is None and isinstance(grid, np.ndarray):
+        row_cells = ([(i, j) for j in np.flatnonzero(grid[i] >= 0).tolist()] for i in range(rows))
+    elif cells is None:
+        row_cells = ([(i, j) for j in range(cols) if grid[i][j].isdigit()] for i in range(rows))
+    else:
+        by_row = {}
+        for i, j in cells:
+            by_row.setdefault(i, []).append((i, j))
+        row_cells = (by_row[i] for i in sorted(by_row))
+
+    for cells_in_row in row_cells:
+        band = []
+        for i, j in cells_in_row:
+            # Digit cells are never traps. With a compact variable map they
+            # have no variable at all; otherwise force their variable False
+            if (i, j) in variables:
+                _append_guarded(band, [-variables[(i, j)]], selectors, (i, j))
+
+            k = int(grid[i][j])
+            neighbors = get_neighbors(i, j, rows, cols)
+            # Neighbours without a variable are known digits (constant False)
+            neighbor_vars = [variables[cell] for cell in neighbors if cell in variables]
+
+            if k > len(neighbor_vars):
+                # Not enough unknown neighbours left: the board is unsatisfiable
+                _append_guarded(band, [], selectors, (i, j))
+                continue
+
+            # Generate constraints for "exactly k neighbors are traps"
+            if selectors is not None and (i, j) in selectors:
+                cell_clauses = []
+                add_exactly_k_constraints(cell_clauses, neighbor_vars, k, encoding, pool)
+                for clause in cell_clauses:
+                    _append_guarded(band, clause, selectors, (i, j))
+            else:
+                add_exactly_k_constraints(band, neighbor_vars, k, encoding, pool)
+        if band:
+            yield band
+
+def write_dimacs(path, clauses):
+    """
+    Stream clauses to a DIMACS file without holding them in memory.
+
+    The header is written as a fixed-width placeholder and patched once the
+    variable and clause counts are known.
+
+    Returns: (number of variables, number of clauses)
+    """
+    header_width = 48
+    nv = count = 0
+    with open(path, "w") as f:
+        f.write(" " * header_width + "\n")
+        for clause in clauses:
+            for lit in clause:
+                if abs(lit) > nv:
+                    nv = abs(lit)
+            f.write(" ".join(map(str, clause)) + " 0\n")
+            count += 1
+        f.seek(0)
+        f.write(f"p cnf {nv} {count}".ljust(header_width))
+    return nv, count
+
+def _append_guarded(cnf, clause, selectors, cell):
+    if selectors is not None and cell in selectors:
+        clause = [-selectors[cell]] + clause
+    cnf.append(clause)
+
+def choose_encoding(n, k):
+    """
+    Pick the encoding with the fewest clauses for "exactly k of n".
+
+    Combinations needs no auxiliary variables and wins for the at most 8
+    neighbours of a grid cell; the sequential counter takes over once the
+    binomial clause count outgrows its O(n*k) size.
+    """
+    if k <= 0 or k >= n:
+        return "combinations"
+    combinations_size = comb(n, n - k + 1) + comb(n, k + 1)
+    seqcounter_size = _seqcounter_size(n, k) + _seqcounter_size(n, n - k)
+    return "combinations" if combinations_size <= seqcounter_size else "seqcounter"
+
+def _seqcounter_size(n, k):
+    # Clause count of Sinz's sequential counter for "at most k of n"
+    if k == 0:
+        return n
+    if k >= n:
+        return 0
+    return 2 * n * k + n - 3 * k - 1
+
+def add_exactly_k_constraints(cnf, variables, k, encoding="combinations", pool=None):
     """
     Add CNF clauses that enforce exactly k variables are True.
-    
+
     Args:
-        cnf: The CNF formula to add clauses to
+        cnf: The CNF formula (or plain list) to add clauses to
         variables: List of variables
         k: The exact number of variables that should be True
+        encoding: Cardinality encoding to use (see ENCODINGS)
+        pool: VariablePool for auxiliary variables (required by every
+            encoding except "combinations")
     """
     n = len(variables)
-    
+
     # Check if k is valid
     if k < 0 or k > n:
         raise ValueError(f"Invalid k value: {k}. Must be between 0 and {n}.")
-    
+
     # Special cases for efficiency
     if k == 0:
         # All variables must be False
         for var in variables:
             cnf.append([-var])
         return
-    
+
     if k == n:
         # All variables must be True
         for var in variables:
             cnf.append([var])
         return
-    
+
+    if encoding == "auto":
+        encoding = choose_encoding(n, k)
+
+    if encoding == "combinations":
+        add_combinations_constraints(cnf, variables, k)
+    elif encoding == "seqcounter":
+        # "At most k" of the variables and "at most n-k" of their negations
+        add_seqcounter_at_most(cnf, variables, k, pool)
+        add_seqcounter_at_most(cnf, [-var for var in variables], n - k, pool)
+    elif encoding == "totalizer":
+        add_totalizer_constraints(cnf, variables, k, pool)
+    elif encoding in PYSAT_ENCODINGS:
+        add_pysat_constraints(cnf, variables, k, PYSAT_ENCODINGS[encoding], pool)
+    else:
+        raise ValueError(f"Unknown encoding: {encoding}. Choose from {', '.join(ENCODINGS)}.")
+
+def add_combinations_constraints(cnf, variables, k):
+    """
+    Binomial encoding: one clause per subset, no auxiliary variables.
+    Produces C(n, n-k+1) + C(n, k+1) clauses.
+    """
+    n = len(variables)
+
     # "At least k" constraint:
     # We can't have more than n-k variables be False
     # So for any selection of n-k+1 variables, at least one must be True
     for combo in itertools.combinations(variables, n-k+1):
         cnf.append(list(combo))  # Creates an OR clause of positive literals
-    
+
     # "At most k" constraint:
     # We can't have more than k variables be True
     # So for any selection of k+1 variables, at least one must be False
     for combo in itertools.combinations(variables, k+1):
-        cnf.append([-var for var in combo])  # Creates an OR clause of negative literals
\ No newline at end of file
+        cnf.append([-var for var in combo])  # Creates an OR clause of negative literals
+
+def add_seqcounter_at_most(cnf, literals, k, pool):
+    """
+    Sinz's sequential counter for "at most k of the literals are True".
+    Uses (n-1)*k auxiliary variables and O(n*k) clauses.
+    """
+    n = len(literals)
+    if k >= n:
+        return
+    if k == 0:
+        for lit in literals:
+            cnf.append([-lit])
+        return
+
+    # s[i][j] is True if at least j+1 of literals[0..i] are True
+    s = [[pool.new() for _ in range(k)] for _ in range(n - 1)]
+
+    cnf.append([-literals[0], s[0][0]])
+    for j in range(1, k):
+        cnf.append([-s[0][j]])
+
+    for i in range(1, n - 1):
+        x = literals[i]
+        cnf.append([-x, s[i][0]])
+        cnf.append([-s[i-1][0], s[i][0]])
+        for j in range(1, k):
+            cnf.append([-x, -s[i-1][j-1], s[i][j]])
+            cnf.append([-s[i-1][j], s[i][j]])
+        cnf.append([-x, -s[i-1][k-1]])
+
+    cnf.append([-literals[n-1], -s[n-2][k-1]])
+
+def add_totalizer_constraints(cnf, variables, k, pool):
+    """
+    Totalizer encoding (Bailleux & Boufkhad): a binary tree of unary adders
+    whose root outputs r[0..n-1] mean "at least j+1 variables are True".
+    """
+    n = len(variables)
+    root = _totalizer_tree(cnf, list(variables), pool)
+    if k > 0:
+        cnf.append([root[k-1]])
+    if k < n:
+        cnf.append([-root[k]])
+
+def _totalizer_tree(cnf, literals, pool):
+    if len(literals) == 1:
+        return literals
+    mid = len(literals) // 2
+    a = _totalizer_tree(cnf, literals[:mid], pool)
+    b = _totalizer_tree(cnf, literals[mid:], pool)
+    p, q = len(a), len(b)
+    r = [pool.new() for _ in range(p + q)]
+
+    for i in range(p + 1):
+        for j in range(q + 1):
+            # a >= i and b >= j  ->  r >= i+j
+            if i + j > 0:
+                clause = [r[i+j-1]]
+                if i > 0:
+                    clause.append(-a[i-1])
+                if j > 0:
+                    clause.append(-b[j-1])
+                cnf.append(clause)
+            # a <= i and b <= j  ->  r <= i+j
+            if i + j < p + q:
+                clause = [-r[i+j]]
+                if i < p:
+                    clause.append(a[i])
+                if j < q:
+                    clause.append(b[j])
+                cnf.append(clause)
+    return r
+
+def add_pysat_constraints(cnf, variables, k, enc_name, pool):
+    """
+    Delegate "exactly k" to pysat.card, keeping its auxiliary variables
+    inside the shared pool.
+    """
+    from pysat.card import CardEnc, EncType
+
+    encoded = CardEnc.equals(lits=list(variables), bound=k, top_id=pool.top,
+                             encoding=getattr(EncType, enc_name))
+    for clause in encoded.clauses:
+        cnf.append(clause)
+    pool.reserve(encoded.nv)
@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cnf_generator import generate_cnf
+from utils import get_neighbors, VariablePool
+
+# Components with at most this many variables go to the backtracking solver
+SMALL_COMPONENT_VARS = 24
+
+# Below this many components the pool start-up costs more than it saves
+MIN_PARALLEL_COMPONENTS = 8
+
+def find_components(grid, variables):
+    """
+    Partition the constraint graph into independent regions.
+
+    Two unknown cells are connected when they neighbour the same number
+    cell, so components share no variables and can be solved separately.
+
+    Args:
+        grid: 2D grid where each cell contains a digit, '_', or '*'
+        variables: Dictionary mapping cell coordinates to variable IDs
+
+    Returns:
+        (components, unconstrained) where components is a list of
+        (number_cells, vars) tuples and unconstrained lists the variables of
+        cells that have no numbered neighbour
+    """
+    rows, cols = len(grid), len(grid[0])
+    parent = {}
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    number_cells = []
+    anchors = []
+    for i in range(rows):
+        for j in range(cols):
+            if not grid[i][j].isdigit():
+                continue
+            neighbor_vars = [variables[cell] for cell in get_neighbors(i, j, rows, cols)
+                             if cell in variables]
+            if (i, j) in variables:
+                neighbor_vars.append(variables[(i, j)])
+            for var in neighbor_vars:
+                parent.setdefault(var, var)
+            for var in neighbor_vars[1:]:
+                a, b = find(neighbor_vars[0]), find(var)
+                if a != b:
+                    parent[b] = a
+            number_cells.append((i, j))
+            anchors.append(neighbor_vars[0] if neighbor_vars else None)
+
+    groups = {}
+    for var in parent:
+        groups.setdefault(find(var), ([], []))[1].append(var)
+    # Number cells without unknown neighbours still need checking (k > 0 is unsatisfiable)
+    isolated = []
+    for cell, anchor in zip(number_cells, anchors):
+        if anchor is None:
+            isolated.append(cell)
+        else:
+            groups[find(anchor)][0].append(cell)
+
+    components = list(groups.values())
+    if isolated:
+        components.append((isolated, []))
+    unconstrained = [var for var in variables.values() if var not in parent]
+    return components, unconstrained
+
+def _solve_component(task):
+    solver_name, cnf, variables = task
+    if solver_name == "backtracking":
+        from solver_backtracking import solver_backtracking
+        return solver_backtracking(cnf, variables)
+    from solver_pysat import solver_pysat
+    return solver_pysat(cnf, variables)
+
+def solver_decomposed(grid, variables):
+    """
+    (grid, variables) solver for the registry. Components are solved in
+    parallel when called from the main process (the menu) and inline
+    inside a batch or server worker or a timed run, which must not start
+    a pool of their own.
+    """
+    processes = None if multiprocessing.parent_process() is None else 1
+    return solve_decomposed(grid, variables, processes=processes)
+
+def solve_decomposed(grid, variables, encoding="auto", processes=None,
+                     small_threshold=SMALL_COMPONENT_VARS):
+    """
+    Solve the board one independent component at a time.
+
+    Small components are handed to the backtracking solver and large ones to
+    PySAT; with enough components a process pool spreads them across cores.
+    Cells with no numbered neighbour are set to gems without any solving.
+
+    Args:
+        grid: 2D grid where each cell contains a digit, '_', or '*'
+        variables: Dictionary mapping cell coordinates to variable IDs
+        encoding: Cardinality encoding passed to generate_cnf
+        processes: Worker processes (defaults to the CPU count; 1 solves inline)
+        small_threshold: Largest component (in variables) sent to backtracking
+
+    Returns:
+        Model over all variables (same format as the solvers), or None if any
+        component is unsatisfiable
+    """
+    components, unconstrained = find_components(grid, variables)
+    pool = VariablePool(max(variables.values(), default=0))
+
+    tasks = []
+    for number_cells, component_vars in components:
+        first_aux = pool.top + 1
+        cnf = generate_cnf(grid, variables, encoding, pool, cells=number_cells)
+        component_vars = component_vars + list(range(first_aux, pool.top + 1))
+        solver_name = "backtracking" if len(component_vars) <= small_threshold else "pysat"
+        tasks.append((solver_name, cnf, component_vars))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes > 1 and len(tasks) >= MIN_PARALLEL_COMPONENTS:
+        chunksize = max(1, len(tasks) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_solve_component, tasks, chunksize=chunksize))
+    else:
+        results = [_solve_component(task) for task in tasks]
+
+    model = [-var for var in unconstrained]
+    for result in results:
+        if result is None:
+            return None
+        model.extend(result)
+    return model
@@ -0,0 +1,93 @@
+from array import array
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class FlatCNF:
+    """
+    CNF stored as one flat int32 literal buffer plus clause offsets.
+
+    Clause c is literals[offsets[c]:offsets[c + 1]], so a formula costs four
+    bytes per literal and per clause instead of a Python list per clause and
+    an int object per literal. Appending uses array('i') buffers; numpy()
+    exposes them as int32 arrays without copying. The buffers can also live
+    in a multiprocessing.shared_memory block (see share/attach) so worker
+    processes read the formula without it being pickled.
+    """
+    def __init__(self, literals=None, offsets=None, nv=0):
+        self.literals = array('i') if literals is None else literals
+        self.offsets = array('i', [0]) if offsets is None else offsets
+        self.nv = nv
+        self._shm = None
+
+    @classmethod
+    def from_clauses(cls, clauses, nv=0):
+        flat = cls(nv=nv)
+        for clause in clauses:
+            flat.append(clause)
+        return flat
+
+    def append(self, clause):
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+        for lit in clause:
+            if abs(lit) > self.nv:
+                self.nv = abs(lit)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, c):
+        return self.literals[self.offsets[c]:self.offsets[c + 1]].tolist()
+
+    def __iter__(self):
+        literals, offsets = self.literals, self.offsets
+        for c in range(len(offsets) - 1):
+            yield literals[offsets[c]:offsets[c + 1]].tolist()
+
+    def numpy(self):
+        """Return (literals, offsets) as int32 NumPy views of the buffers."""
+        return (np.frombuffer(self.literals, dtype=np.int32),
+                np.frombuffer(self.offsets, dtype=np.int32))
+
+    def share(self):
+        """
+        Copy the formula into a new shared memory block.
+
+        Returns: FlatCNF backed by the block; pass its handle() to workers,
+        which open it with FlatCNF.attach. The caller owns the block and
+        must close() and unlink() the returned copy once workers are done.
+        """
+        n_offsets, n_literals = len(self.offsets), len(self.literals)
+        shm = shared_memory.SharedMemory(create=True, size=4 * (n_offsets + n_literals))
+        buf = np.ndarray(n_offsets + n_literals, dtype=np.int32, buffer=shm.buf)
+        buf[:n_offsets] = self.numpy()[1]
+        buf[n_offsets:] = self.numpy()[0]
+        return FlatCNF.attach((shm.name, n_offsets, n_literals, self.nv), shm)
+
+    def handle(self):
+        return (self._shm.name, len(self.offsets), len(self.literals), self.nv)
+
+    @classmethod
+    def attach(cls, handle, shm=None):
+        """Open a formula shared by share(), from the handle() of the owner."""
+        name, n_offsets, n_literals, nv = handle
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=name)
+        view = shm.buf.cast('i')
+        flat = cls(view[n_offsets:n_offsets + n_literals], view[:n_offsets], nv)
+        flat._shm = shm
+        flat._view = view
+        return flat
+
+    def close(self):
+        if self._shm is not None:
+            # Views into the block must be released before it can be closed
+            for view in (self.literals, self.offsets, self._view):
+                view.release()
+            self.literals = self.offsets = self._view = None
+            self._shm.close()
+
+    def unlink(self):
+        if self._shm is not None:
+            self._shm.unlink()
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# Stats object the solvers report to; None means instrumentation
+# is off, and then the only cost is this one lookup per solver call
+ACTIVE = None
+
+class SolverStats:
+    """
+    Counters, phase timers and solver statistics for one run.
+
+    counters: search nodes, backtracks, clause checks, ... (see the solvers)
+    timers: seconds per named phase (see phase())
+    solver: statistics reported by the SAT backend (PySAT accum_stats())
+    samples: hottest lines seen by the sampling profiler, if it was on
+    """
+    def __init__(self, label=None):
+        self.label = label
+        self.counters = {}
+        self.timers = {}
+        self.solver = {}
+        self.samples = None
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + perf_counter() - start
+
+    def to_dict(self):
+        result = {"label": self.label, "counters": self.counters, "timers": self.timers,
+                  "solver": self.solver}
+        if self.samples is not None:
+            result["samples"] = self.samples
+        return result
+
+    def dump(self, path):
+        """Append the stats to a JSON-lines file."""
+        with open(path, "a") as f:
+            f.write(json.dumps(self.to_dict()) + "\n")
+
+class _Sampler(threading.Thread):
+    # Periodically records which line the profiled thread is executing
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                code = frame.f_code
+                key = f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def top(self, n=20):
+        return dict(sorted(self.counts.items(), key=lambda item: -item[1])[:n])
+
+@contextmanager
+def collect(stats, sample_interval=None):
+    """
+    Make `stats` the active collector for the enclosed code.
+
+    With sample_interval (seconds), a background thread also samples the
+    current thread's stack and stores the hottest lines in stats.samples.
+    """
+    global ACTIVE
+    previous, ACTIVE = ACTIVE, stats
+    sampler = None
+    if sample_interval:
+        sampler = _Sampler(threading.get_ident(), sample_interval)
+        sampler.start()
+    try:
+        yield stats
+    finally:
+        ACTIVE = previous
+        if sampler is not None:
+            sampler.stopped.set()
+            sampler.join()
+            stats.samples = sampler.top()
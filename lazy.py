@@ -0,0 +1,88 @@
+from pysat.solvers import Solver
+
+import instrumentation
+from cnf_generator import generate_cnf
+from utils import assign_variables, get_neighbors, VariablePool
+
+def solve_lazy(grid, variables=None, solver_name="m22", stats=None):
+    """
+    Solve a board by adding number constraints only where they are needed.
+
+    The solver starts from a relaxation: the unit clauses of the number
+    cells whose value settles all their unknown neighbours (0, or equal to
+    the number of unknown neighbours). Each round solves incrementally,
+    checks the model against the remaining numbers and adds the full
+    cardinality encoding (generate_cnf with cells=...) of every violated
+    one. Only numbers next to a cell whose value changed since the last
+    model are re-checked, and encoded numbers always hold, so the work
+    per round and the final formula scale with the "hard" cells rather
+    than with the board area.
+
+    Returns: (model or None if unsatisfiable, number of cells that needed
+    their full encoding)
+    """
+    stats = stats if stats is not None else instrumentation.ACTIVE
+    if variables is None:
+        variables = assign_variables(grid)
+    rows, cols = len(grid), len(grid[0])
+    pool = VariablePool(max(variables.values(), default=0))
+
+    # Number cell -> (its value, variables of its unknown neighbours)
+    numbers = {}
+    watchers = {}  # variable -> number cells next to it
+    for i in range(rows):
+        for j in range(cols):
+            if grid[i][j].isdigit():
+                around = [variables[cell] for cell in get_neighbors(i, j, rows, cols) if cell in variables]
+                numbers[(i, j)] = (int(grid[i][j]), around)
+                for var in around:
+                    watchers.setdefault(var, []).append((i, j))
+
+    with Solver(name=solver_name) as solver:
+        encoded = set()
+        for cell, (k, around) in numbers.items():
+            if k > len(around):
+                return None, 0
+            if k == 0 or k == len(around):
+                for var in around:
+                    solver.add_clause([var] if k else [-var])
+                encoded.add(cell)
+
+        previous = None
+        rounds = hard = 0
+        while True:
+            rounds += 1
+            if not solver.solve():
+                model = None
+                break
+            model = solver.get_model()
+            traps = {lit for lit in model if lit > 0}
+            # Every number left out was satisfied by the previous model, so
+            # only those next to a cell that flipped since then can break
+            if previous is None:
+                candidates = [cell for cell in numbers if cell not in encoded]
+            else:
+                candidates = {cell for var in traps.symmetric_difference(previous)
+                              for cell in watchers.get(var, ()) if cell not in encoded}
+            previous = traps
+            violated = [cell for cell in candidates
+                        if sum(var in traps for var in numbers[cell][1]) != numbers[cell][0]]
+            if not violated:
+                break
+            for clause in generate_cnf(grid, variables, pool=pool, cells=violated, stream=True):
+                solver.add_clause(clause)
+            encoded.update(violated)
+            hard += len(violated)
+
+        if model is not None:
+            # Cells the solver never saw (no constraint mentions them) are gems
+            model += [-var for var in range(len(model) + 1, pool.top + 1)]
+        if stats is not None:
+            stats.count("lazy_rounds", rounds)
+            stats.count("cells_encoded", hard)
+            stats.solver.update(solver.accum_stats())
+    return model, hard
+
+def solver_lazy(grid, variables):
+    """(grid, variables) solver for the batch and menu tables."""
+    return solve_lazy(grid, variables)[0]
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+from time import perf_counter
+
+from batch import find_inputs
+from utils import read_input_file
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def _open(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+async def _request(reader, writer, host, body):
+    writer.write((f"POST /solve HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    response = json.loads(await reader.readexactly(length))
+    return status, response
+
+async def _client(args, bodies, counter, latencies, statuses):
+    reader, writer = await _open(args)
+    try:
+        while counter[0] < args.requests:
+            counter[0] += 1
+            body = random.choice(bodies)
+            start = perf_counter()
+            status, response = await _request(reader, writer, args.host, body)
+            latencies.append(perf_counter() - start)
+            key = f"{status} {response.get('status', response.get('error', ''))}"
+            statuses[key] = statuses.get(key, 0) + 1
+    finally:
+        writer.close()
+
+async def run(args):
+    paths = find_inputs(args.inputs)
+    if not paths:
+        raise SystemExit(f"no input files match {args.inputs}")
+    bodies = [json.dumps({"grid": read_input_file(path), "solver": args.solver}).encode() for path in paths]
+
+    latencies, statuses, counter = [], {}, [0]
+    start = perf_counter()
+    await asyncio.gather(*(_client(args, bodies, counter, latencies, statuses)
+                           for _ in range(args.concurrency)))
+    elapsed = perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "statuses": statuses,
+    }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of server.py.")
+    parser.add_argument("inputs", nargs="?", default="testcases",
+                        help="Directory of input_*.txt files or a glob pattern to send")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Connect to a Unix socket instead of TCP")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent keep-alive connections")
+    parser.add_argument("--solver", default="pysat")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(f"{report['requests']} requests in {report['seconds']:.2f} s: "
+          f"{report['throughput']:.1f} req/s, mean {report['mean_ms']:.2f} ms, "
+          f"p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+    for status, count in sorted(report["statuses"].items()):
+        print(f"  {status}: {count}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,59 +1,232 @@
 import sys
 import os
+import itertools
 from time import time
 
 from cnf_generator import generate_cnf
-from solver_pysat import solver_pysat
-from solver_bruteforce import solver_bruteforce
-from solver_backtracking import solver_backtracking
-from utils import interpret_model, print_grid, write_output_file, read_input_file, assign_variables
-from puzzle_generator import generate_input_file
+from utils import interpret_model, print_grid, write_output_file, read_input_file, assign_variables, solver_variables
+from cache import CNFCache
+from instrumentation import SolverStats, collect
+from solvers import REGISTRY, pick_solver, run
 
+# Solvers, the puzzle generator and the analysis tools are imported by the
+# modes that use them, so `--gen` or a single solver run only pays for what
+# it needs (see startup_check.py)
 
-def run_solver(name, solver_func, grid, variables, cnf):
+
+def run_solver(solver_name, grid, variables, cnf, cache=None, timeout=None,
+               stats_path=None, sample_interval=None, preprocessing=False, encoding="auto"):
+    # solver_name: registry name; the solver is looked up by name (in the
+    # child process too, with a timeout) so nothing unpicklable is passed
+    # cache: CNFCache to reuse models from (off by default in the menu, since
+    # a cached model makes the reported time a disk read); the model must
+    # come from the CNF built with `encoding`
+    name = REGISTRY[solver_name].label
     print(f"\n=== Running {name} Solver ===")
     start = time()
-    model = solver_func(cnf, list(variables.values()))
+    stats = SolverStats(name) if stats_path else None
+    found = False
+    if cache is not None:
+        key = cache.key(grid, variables, encoding)
+        found, model = cache.get_model(key, name)
+        if found:
+            print("(model loaded from cache)")
+    if not found:
+        formula, decision, fixed = cnf, solver_variables(variables, cnf), None
+        if preprocessing:
+            from preprocess import preprocess, free_variables, merge_model, format_report
+            formula, fixed, report = preprocess(cnf)
+            print(format_report(report))
+            if formula is not None:
+                remaining = free_variables(formula)
+                decision = [var for var in decision if var in remaining]
+        args = (solver_name, grid, variables, formula, decision, stats, sample_interval)
+        if formula is None:
+            model = (None, stats) if stats is not None else None
+        elif timeout is None:
+            model = _solve_registered(*args)
+        else:
+            from portfolio import run_with_timeout
+            finished, model = run_with_timeout(_solve_registered, args, timeout)
+            if not finished:
+                elapsed = time() - start
+                print(f"{name} solver: timed out after {timeout:g} seconds.")
+                return None, elapsed
+        if stats is not None:
+            # The solve may have run in a child process: take its stats back
+            model, stats = model
+        if model is not None and fixed:
+            model = merge_model(model, fixed)
+        if cache is not None:
+            cache.put_model(key, name, model)
     elapsed = time() - start
 
     if model is None:
         print(f"{name} solver: No solution found.")
-        return None, elapsed
+        output_grid = None
     else:
         output_grid = interpret_model(grid, variables, model)
         print_grid(output_grid)
-        return output_grid, elapsed
+    if stats is not None:
+        stats.timers["total"] = elapsed
+        print_stats(stats)
+        stats.dump(stats_path)
+    return output_grid, elapsed
+
+def _solve_registered(solver_name, grid, variables, cnf, decision, stats=None, sample_interval=None):
+    # Module level so run_with_timeout can pickle it under spawn
+    if stats is None:
+        return run(solver_name, grid, variables, cnf, decision)
+    with collect(stats, sample_interval), stats.phase("solve"):
+        model = run(solver_name, grid, variables, cnf, decision)
+    return model, stats
+
+def print_stats(stats):
+    for group in (stats.counters, stats.solver):
+        if group:
+            print("  " + ", ".join(f"{name}={value}" for name, value in group.items()))
+    print("  " + ", ".join(f"{name}={seconds:.4f}s" for name, seconds in stats.timers.items()))
+    if stats.samples:
+        print("  hottest lines: " + ", ".join(f"{line} ({n})" for line, n in list(stats.samples.items())[:5]))
+
+
+# Solver runs and comparisons under their long-standing menu numbers;
+# titles come from the registry labels
+SOLVER_MODES = {
+    "1": ["pysat"],
+    "2": ["bruteforce"],
+    "3": ["backtracking"],
+    "4": ["pysat", "bruteforce"],
+    "5": ["backtracking", "bruteforce"],
+    "6": ["backtracking", "pysat"],
+    "7": ["pysat", "bruteforce", "backtracking"],
+    "9": ["decomposed"],
+    "10": ["deduction"],
+    "11": ["deduction", "pysat", "backtracking"],
+    "15": ["lazy"],
+}
+
+# Tools that are not a plain solver run
+TOOLS = {
+    "8": "Generate random input file",
+    "12": "Solver portfolio (race backends in parallel)",
+    "13": "Count solutions",
+    "14": "Forced cells (same in every solution)",
+}
+
+# Registry solvers the menu offers as a tool instead (12 runs the portfolio
+# with a conflict budget and reports every backend)
+TOOL_SOLVERS = ("portfolio",)
+
+def solver_modes():
+    """
+    Solver menu entries: SOLVER_MODES, then, numbered after them, what the
+    registry adds: solvers without a mode or tool of their own, comparisons
+    of the solvers marked for comparison not listed yet, all solvers, and
+    an automatic pick by formula size.
+
+    Returns: Dictionary choice -> (title, solver names)
+    """
+    listed = [SOLVER_MODES[choice] for choice in SOLVER_MODES]
+    extra = [[entry.name] for entry in REGISTRY.values()
+             if [entry.name] not in listed and entry.name not in TOOL_SOLVERS]
+    compared = [entry.name for entry in REGISTRY.values() if entry.compare]
+    for size in range(2, len(compared) + 1):
+        for names in itertools.combinations(compared, size):
+            if not any(set(names) == set(mode) for mode in listed):
+                extra.append(list(names))
+    extra += [list(REGISTRY), ["auto"]]
+
+    def title(names):
+        if names == ["auto"]:
+            return "Auto (pick a solver by formula size)"
+        if names == list(REGISTRY):
+            return "All solvers (skipping any impractical for the board size)"
+        return " vs ".join(REGISTRY[name].label for name in names)
 
+    first = max(int(choice) for choice in list(SOLVER_MODES) + list(TOOLS)) + 1
+    modes = dict(SOLVER_MODES)
+    modes.update((str(number), names) for number, names in enumerate(extra, first))
+    return {choice: (title(names), names) for choice, names in sorted(modes.items(), key=lambda item: int(item[0]))}
 
-def menu():
+def menu(modes):
     print("Choose a mode:")
-    print("1. PySAT Solver")
-    print("2. Brute-force")
-    print("3. Backtracking")
-    print("4. PySAT vs Brute-force")
-    print("5. Backtracking vs Brute-force")
-    print("6. Backtracking vs PySAT")
-    print("7. PySAT vs Brute-force vs Backtracking")
-    print("8. Generate random input file")
+    entries = {choice: title for choice, (title, _) in modes.items()}
+    entries.update(TOOLS)
+    for choice in sorted(entries, key=int):
+        print(f"{choice}. {entries[choice]}")
     print("0. Exit")
     return input("Your choice: ").strip()
 
+def run_solvers(names, grid, variables, cnf, output_file, cache, timeout, stats_path, sample_interval,
+                preprocessing, encoding):
+    num_vars = len(solver_variables(variables, cnf))
+    for name in names:
+        if name == "auto":
+            name = pick_solver(num_vars)
+            print(f"Auto: {REGISTRY[name].label} for {num_vars} variables")
+        entry = REGISTRY[name]
+        if len(names) > 1 and not entry.fits(num_vars):
+            print(f"\n{entry.label}: skipped ({num_vars} variables, practical up to {entry.max_vars})")
+            continue
+        output, elapsed = run_solver(name, grid, variables, cnf, cache, timeout,
+                                     stats_path, sample_interval, preprocessing, encoding)
+        print(f"{entry.label} time: {elapsed:.4f} seconds")
+        if output:
+            write_output_file(output_file, output)
+
 
 def main():
     os.makedirs("testcases", exist_ok=True)
 
-    if len(sys.argv) == 3 and sys.argv[1] == "--gen":
-        size = int(sys.argv[2])
-        generate_input_file(size)
+    if len(sys.argv) >= 2 and sys.argv[1] == "--batch":
+        from batch import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+
+    if len(sys.argv) in (4, 5) and sys.argv[1] == "--tiled":
+        # main.py --tiled INPUT OUTPUT [BAND_ROWS]: solve a huge board band by band
+        from tiled import solve_tiled
+        band_rows = int(sys.argv[4]) if len(sys.argv) == 5 else 64
+        start = time()
+        solved = solve_tiled(sys.argv[2], sys.argv[3], band_rows)
+        print(f"{'Solved' if solved else 'No solution found'} in {time() - start:.4f} seconds")
+        return
+
+    if len(sys.argv) >= 3 and sys.argv[1] == "--gen":
+        # main.py --gen ROWS [COLS] [--count N --seed S --jobs J ...]
+        from puzzle_generator import main as gen_main
+        gen_main(sys.argv[2:])
         return
 
+    # Options for the interactive menu:
+    #   --timeout SECONDS   wall-clock limit per solver run
+    #   --stats PATH        collect solver stats and append them to PATH as JSON lines
+    #   --sample SECONDS    with --stats, also run the sampling profiler
+    #   --preprocess        simplify the CNF before handing it to the solvers
+    #   --cache-models      reuse solver models from the on-disk cache (the
+    #                       reported times are then cache reads)
+    #   --encoding NAME     cardinality encoding of the CNF (default: auto)
+    args = sys.argv[1:]
+    preprocessing = "--preprocess" in args
+    cache_models = "--cache-models" in args
+    args = [arg for arg in args if arg not in ("--preprocess", "--cache-models")]
+    options = dict(zip(args[::2], args[1::2]))
+    encoding = options.get("--encoding", "auto")
+    timeout = float(options["--timeout"]) if "--timeout" in options else None
+    stats_path = options.get("--stats")
+    sample_interval = float(options["--sample"]) if "--sample" in options else None
+
+    cache = CNFCache()
+    modes = solver_modes()
+
     while True:
-        choice = menu()
+        choice = menu(modes)
 
         if choice == "0":
             break
 
-        if choice in {"1", "2", "3", "4", "5", "6", "7"}:
+        if choice in modes or (choice in TOOLS and choice != "8"):
             try:
                 file_num = input("Enter file number: ").strip()
                 input_file = f"testcases/input_{file_num}.txt"
@@ -65,58 +238,57 @@ def main():
 
                 grid = read_input_file(input_file)
                 variables = assign_variables(grid)
-                cnf = generate_cnf(grid, variables)
+                cnf = generate_cnf(grid, variables, encoding, cache=cache)
 
-                if choice == "1":
-                    output, elapsed = run_solver("PySAT", solver_pysat, grid, variables, cnf)
-                    if output:
-                        write_output_file(output_file, output)
-                    print(f"PySAT time: {elapsed:.4f} seconds")
+                if choice in modes:
+                    run_solvers(modes[choice][1], grid, variables, cnf, output_file,
+                                cache if cache_models else None, timeout, stats_path, sample_interval,
+                                preprocessing, encoding)
 
-                elif choice == "2":
-                    output, elapsed = run_solver("Brute-force", solver_bruteforce, grid, variables, cnf)
-                    if output:
+                elif choice == "12":
+                    from portfolio import solve_portfolio, WINNERS_LOG
+                    budget_input = input("Conflict budget per backend (Enter for none): ").strip()
+                    conf_budget = int(budget_input) if budget_input else None
+                    board = {"input": input_file, "rows": len(grid), "cols": len(grid[0])}
+                    print("\n=== Running Solver Portfolio ===")
+                    model, info = solve_portfolio(cnf, solver_variables(variables, cnf), timeout=timeout,
+                                                  conf_budget=conf_budget, log_path=WINNERS_LOG, board=board)
+                    for name, status in info["backends"].items():
+                        print(f"  {name}: {status}")
+                    if model is not None:
+                        output = interpret_model(grid, variables, model)
+                        print_grid(output)
                         write_output_file(output_file, output)
-                    print(f"Brute-force time: {elapsed:.4f} seconds")
+                        print(f"Winner: {info['winner']} in {info['seconds']:.4f} seconds")
+                    else:
+                        print(f"No solution found ({info['status']}) after {info['seconds']:.4f} seconds")
 
-                elif choice == "3":
-                    output, elapsed = run_solver("Backtracking", solver_backtracking, grid, variables, cnf)
-                    if output:
-                        write_output_file(output_file, output)
-                    print(f"Backtracking time: {elapsed:.4f} seconds")
-
-                elif choice == "4":
-                    for name, solver in [("PySAT", solver_pysat), ("Brute-force", solver_bruteforce)]:
-                        output, elapsed = run_solver(name, solver, grid, variables, cnf)
-                        print(f"{name} time: {elapsed:.4f} seconds")
-                        if output:
-                            write_output_file(output_file, output)
-
-                elif choice == "5":
-                    for name, solver in [("Backtracking", solver_backtracking), ("Brute-force", solver_bruteforce)]:
-                        output, elapsed = run_solver(name, solver, grid, variables, cnf)
-                        print(f"{name} time: {elapsed:.4f} seconds")
-                        if output:
-                            write_output_file(output_file, output)
-
-                elif choice == "6":
-                    for name, solver in [("Backtracking", solver_backtracking), ("PySAT", solver_pysat)]:
-                        output, elapsed = run_solver(name, solver, grid, variables, cnf)
-                        print(f"{name} time: {elapsed:.4f} seconds")
-                        if output:
-                            write_output_file(output_file, output)
-
-                elif choice == "7":
-                    for name, solver in [
-                        ("PySAT", solver_pysat),
-                        ("Backtracking", solver_backtracking),
-                        ("Brute-force", solver_bruteforce)
-                    ]:
-                        output, elapsed = run_solver(name, solver, grid, variables, cnf)
-                        print(f"{name} time: {elapsed:.4f} seconds")
-
-                        if output:
-                            write_output_file(output_file, output)
+                elif choice == "13":
+                    from model_counter import count_solutions
+                    limit_input = input("Stop counting at (Enter for an exact count): ").strip()
+                    limit = int(limit_input) if limit_input else None
+                    start = time()
+                    count, capped = count_solutions(grid, variables, limit)
+                    elapsed = time() - start
+                    print(f"Solutions: {'at least ' if capped else ''}{count}")
+                    print(f"Counting time: {elapsed:.4f} seconds")
+
+                elif choice == "14":
+                    from backbone import forced_cells, render_forced_map
+                    start = time()
+                    cells = forced_cells(grid, variables, cnf)
+                    elapsed = time() - start
+                    if cells is None:
+                        print("No solution found.")
+                    else:
+                        solution = interpret_model(grid, variables, REGISTRY["pysat"](cnf, None))
+                        forced = render_forced_map(grid, cells)
+                        print("\nSolution" + " " * (3 * len(grid[0]) - 6) + "Forced (? = free)")
+                        for left, right in zip(solution, forced):
+                            print(f"{', '.join(left)}    {', '.join(right)}")
+                        free = sum(1 for mark in cells.values() if mark == '?')
+                        print(f"{len(cells) - free} forced, {free} free cells")
+                    print(f"Analysis time: {elapsed:.4f} seconds")
 
             except ValueError:
                 print("Invalid input. Try again.")
@@ -140,21 +312,22 @@ def main():
                         continue
                 else:
                     # If no file number provided, get the next available one
-                    from puzzle_generator import get_next_file_number
-                    file_num = get_next_file_number()
+                    file_num = None
                 
                 # Get grid dimensions
                 rows = int(input("Enter number of rows (e.g., 5): ").strip())
                 cols_input = input("Enter number of columns (or press Enter to use same as rows): ").strip()
                 cols = int(cols_input) if cols_input else rows
                 
-                missing_input = input("Enter number of numbers to hide (or press Enter for default): ").strip()
-                num_missing = int(missing_input) if missing_input else None
+                missing_input = input("Enter number of numbers to hide (Enter for default, 'max' for as many as possible): ").strip()
+                maximize = missing_input.lower() == "max"
+                num_missing = int(missing_input) if missing_input and not maximize else None
                 
                 trap_prob_input = input("Enter trap probability (0.0-1.0, or press Enter for default 0.2): ").strip()
                 trap_probability = float(trap_prob_input) if trap_prob_input else 0.2
                 
-                result_file_num = generate_input_file(rows, cols, num_missing, trap_probability, file_num)
+                from puzzle_generator import generate_input_file
+                result_file_num = generate_input_file(rows, cols, num_missing, trap_probability, file_num, maximize=maximize)
                 if result_file_num:
                     print(f"Generated testcases/input_{result_file_num}.txt with dimensions {rows}x{cols}")
                     print(f"Solution saved to testcases/solution_{result_file_num}.txt")
@@ -165,6 +338,8 @@ def main():
                 
         else:
             print("Invalid choice. Try again.")
+    stats = cache.stats()
+    print(f"Cache hits: {stats['hits']}, misses: {stats['misses']}")
     print("Exiting the program.")
 
 
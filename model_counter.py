@@ -0,0 +1,145 @@
+from cnf_generator import generate_cnf
+from utils import assign_variables
+
+def count_models(cnf, variables, limit=None):
+    """
+    Count the assignments of `variables` that satisfy a CNF.
+
+    DPLL-style exact counter: unit propagation fixes forced variables, the
+    remaining clauses are split into independent components whose counts
+    multiply, and every component's count is cached under its sorted clause
+    list so identical subproblems reached through different branches are
+    counted once. Variables that no longer occur in any clause are free and
+    double the count.
+
+    The CNF must not contain auxiliary variables that are not functionally
+    determined by `variables` (use encoding="combinations"), otherwise their
+    assignments are counted too.
+
+    Args:
+        cnf: Clauses to satisfy (pysat CNF, FlatCNF or list of clauses)
+        variables: Variables to count over; variables of the CNF not listed
+            here are counted as well
+        limit: Stop once at least this many models are known (None = exact)
+
+    Returns:
+        (count, capped); when capped is True the board has at least `count`
+        (== limit) models
+    """
+    clauses = [tuple(sorted(clause)) for clause in (cnf.clauses if hasattr(cnf, "clauses") else cnf)]
+    scope = set(variables)
+    for clause in clauses:
+        scope.update(abs(lit) for lit in clause)
+    return _count(clauses, scope, limit, {})
+
+def count_solutions(grid, variables=None, limit=None):
+    """Count the trap placements consistent with a board (see count_models)."""
+    if variables is None:
+        variables = assign_variables(grid)
+    cnf = generate_cnf(grid, variables, encoding="combinations")
+    return count_models(cnf, variables.values(), limit)
+
+def _propagate(clauses):
+    # Returns (simplified clauses, number of assigned variables), or None on conflict
+    assigned = 0
+    while True:
+        units = {clause[0] for clause in clauses if len(clause) == 1}
+        if not units:
+            return clauses, assigned
+        falsified = {-lit for lit in units}
+        if not units.isdisjoint(falsified):
+            return None
+        assigned += len(units)
+        simplified = []
+        for clause in clauses:
+            if not units.isdisjoint(clause):
+                continue
+            if not falsified.isdisjoint(clause):
+                clause = tuple(lit for lit in clause if lit not in falsified)
+                if not clause:
+                    return None
+            simplified.append(clause)
+        clauses = simplified
+
+def _components(clauses):
+    # Group clauses that share variables (union-find over variables)
+    parent = {}
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for clause in clauses:
+        root = None
+        for lit in clause:
+            v = abs(lit)
+            parent.setdefault(v, v)
+            if root is None:
+                root = find(v)
+            else:
+                other = find(v)
+                if other != root:
+                    parent[other] = root
+
+    groups = {}
+    for clause in clauses:
+        groups.setdefault(find(abs(clause[0])), []).append(clause)
+    return groups.values()
+
+def _count(clauses, scope, limit, cache):
+    # An empty clause (a digit above its unknown neighbour count) has no models
+    if () in clauses:
+        return 0, False
+    propagated = _propagate(clauses)
+    if propagated is None:
+        return 0, False
+    clauses, fixed = propagated
+
+    occurring = {abs(lit) for clause in clauses for lit in clause}
+    total = 2 ** (len(scope) - fixed - len(occurring))
+    capped = False
+    for component in _components(clauses):
+        count, component_capped = _count_component(component, limit, cache)
+        if count == 0:
+            return 0, False
+        total *= count
+        capped = capped or component_capped
+    if limit is not None and total >= limit:
+        return limit, True
+    return total, capped
+
+def _count_component(clauses, limit, cache):
+    key = tuple(sorted(clauses))
+    if key in cache:
+        count, capped = cache[key]
+        # A capped entry is only a lower bound; reuse it if it reaches the limit
+        if not capped:
+            return count, False
+        if limit is not None and count >= limit:
+            return limit, True
+
+    scope = {abs(lit) for clause in clauses for lit in clause}
+    occurrences = {}
+    for clause in clauses:
+        for lit in clause:
+            occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+    # Branch next to the lowest variable: cell variables are numbered row by
+    # row, so the search sweeps the board and leaves a narrow frontier,
+    # which is what lets finished regions split off as cached components
+    first = min(occurrences)
+    window = {abs(lit) for clause in clauses if first in map(abs, clause) for lit in clause}
+    var = max(window, key=occurrences.get)
+
+    trap, trap_capped = _count(clauses + [(var,)], scope, limit, cache)
+    if limit is not None and trap >= limit:
+        cache[key] = (limit, True)
+        return limit, True
+    gem, gem_capped = _count(clauses + [(-var,)], scope, None if limit is None else limit - trap, cache)
+    total = trap + gem
+    capped = trap_capped or gem_capped
+    cache[key] = (total, capped)
+    if limit is not None and total >= limit:
+        return limit, True
+    return total, capped
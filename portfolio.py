@@ -0,0 +1,169 @@
+import json
+import multiprocessing
+import queue
+from time import time
+
+from flat_cnf import FlatCNF
+from solver_backtracking import solver_backtracking
+
+# Backends raced by default: PySAT solver names plus our own backtracking
+PORTFOLIO = ("glucose4", "cadical153", "minisat22", "lingeling", "backtracking")
+
+# Lingeling has no limited solve in PySAT; it only obeys the wall clock
+NO_CONFLICT_BUDGET = {"lingeling", "backtracking"}
+
+WINNERS_LOG = "portfolio_winners.jsonl"
+
+def _context():
+    # fork is cheapest where available; elsewhere (spawn) everything handed
+    # to a child must be picklable, i.e. module-level functions and data
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+def _run_backend(name, handle, variables, conf_budget, results):
+    flat = FlatCNF.attach(handle)
+    model = None
+    try:
+        if name == "backtracking":
+            model = solver_backtracking(flat, variables)
+            status = "sat" if model is not None else "unsat"
+        else:
+            from pysat.solvers import Solver
+
+            with Solver(name=name, bootstrap_with=flat) as solver:
+                if conf_budget is not None and name not in NO_CONFLICT_BUDGET:
+                    solver.conf_budget(conf_budget)
+                    outcome = solver.solve_limited()
+                else:
+                    outcome = solver.solve()
+                if outcome:
+                    model = solver.get_model()
+                status = {True: "sat", False: "unsat", None: "budget"}[outcome]
+    except Exception as e:
+        status = f"error: {e}"
+    finally:
+        flat.close()
+    results.put((name, status, model))
+
+def solve_portfolio(cnf, variables, backends=PORTFOLIO, timeout=None, conf_budget=None,
+                    log_path=None, board=None):
+    """
+    Race several solvers on the same CNF, one process each.
+
+    The formula is placed in shared memory once and every backend attaches
+    to it. The first backend to prove sat or unsat wins and the others are
+    terminated.
+
+    Args:
+        cnf: pysat CNF, FlatCNF or list of clauses
+        variables: Decision variables (used by the backtracking backend)
+        backends: Names from PORTFOLIO
+        timeout: Wall-clock limit in seconds for the whole race (None = none)
+        conf_budget: Conflict limit per PySAT backend (None = none); a
+            backend that runs out reports "budget" and drops out of the race
+        log_path: If given, a JSON line describing the race is appended to it
+        board: Optional dict (e.g. input file, rows, cols) added to the log line
+
+    Returns:
+        (model or None, info) where info holds the status ("sat", "unsat",
+        "timeout" or "unknown"), the winner, the elapsed seconds and the
+        outcome of every backend
+    """
+    if isinstance(cnf, FlatCNF):
+        flat = cnf
+    else:
+        flat = FlatCNF.from_clauses(cnf.clauses if hasattr(cnf, "clauses") else cnf)
+    shared = flat.share()
+    ctx = _context()
+    results = ctx.Queue()
+    processes = {name: ctx.Process(target=_run_backend, daemon=True,
+                                   args=(name, shared.handle(), list(variables), conf_budget, results))
+                 for name in backends}
+
+    start = time()
+    for process in processes.values():
+        process.start()
+
+    info = {"status": "unknown", "winner": None, "backends": {}}
+    model = None
+    pending = set(processes)
+    while pending:
+        wait = 0.1
+        if timeout is not None:
+            wait = min(wait, start + timeout - time())
+            if wait <= 0:
+                info["status"] = "timeout"
+                break
+        try:
+            name, status, result = results.get(timeout=wait)
+        except queue.Empty:
+            # A backend that died without reporting (e.g. killed) drops out
+            for name in [n for n in pending if not processes[n].is_alive()]:
+                if results.empty():
+                    pending.discard(name)
+                    info["backends"][name] = "died"
+            continue
+        pending.discard(name)
+        info["backends"][name] = status
+        if status in ("sat", "unsat"):
+            info["status"], info["winner"], model = status, name, result
+            break
+    info["seconds"] = time() - start
+
+    for name in pending:
+        info["backends"][name] = "cancelled" if info["winner"] else info["status"]
+    for process in processes.values():
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    results.close()
+    shared.close()
+    shared.unlink()
+
+    if log_path is not None:
+        record = dict(board or {}, variables=len(variables), clauses=len(flat), **info)
+        with open(log_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    return model, info
+
+def solver_portfolio(cnf, variables):
+    """CNF solver interface: race the default portfolio and log the winner."""
+    model, _ = solve_portfolio(cnf, variables, log_path=WINNERS_LOG)
+    return model
+
+def _call_and_send(conn, func, args):
+    try:
+        conn.send((True, func(*args)))
+    except Exception as e:
+        conn.send((False, e))
+    conn.close()
+
+def run_with_timeout(func, args, timeout):
+    """
+    Run func(*args) in a child process and kill it after `timeout` seconds.
+
+    func must be a module-level function and args picklable, so this also
+    works where processes are spawned rather than forked (Windows, macOS).
+
+    Returns: (finished, result); result is None when the call timed out.
+    Exceptions raised by func are re-raised here.
+    """
+    ctx = _context()
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_call_and_send, args=(sender, func, args))
+    process.start()
+    sender.close()
+    finished = receiver.poll(timeout)
+    if finished:
+        try:
+            ok, result = receiver.recv()
+        except EOFError:
+            ok, result = False, RuntimeError("solver process died")
+    process.terminate()
+    process.join()
+    receiver.close()
+    if not finished:
+        return False, None
+    if not ok:
+        raise result
+    return True, result
@@ -0,0 +1,132 @@
+from pysat.formula import CNF
+
+def preprocess(cnf):
+    """
+    Simplify a CNF before search.
+
+    - Unit propagation to a fixpoint through a literal -> clause occurrence
+      index; variables fixed this way disappear from the formula.
+    - Tautologies and duplicate clauses are dropped by hashing each clause's
+      literal set.
+    - Subsumed clauses are removed: each clause, shortest first, is compared
+      only with the clauses that share its rarest literal.
+
+    Variable IDs are left unchanged, so a model of the simplified formula
+    combined with the fixed assignment (merge_model) is a model of the
+    original one.
+
+    Args:
+        cnf: pysat CNF (or list of clauses)
+
+    Returns:
+        (simplified CNF or None if propagation found a conflict,
+         fixed assignment as var -> bool, report dict)
+    """
+    source = cnf.clauses if hasattr(cnf, "clauses") else cnf
+    nv = getattr(cnf, "nv", 0) or max((abs(lit) for clause in source for lit in clause), default=0)
+    report = {"clauses_before": len(source), "literals_before": sum(len(c) for c in source)}
+
+    # Duplicates and tautologies
+    seen = set()
+    clauses = []
+    for clause in source:
+        key = frozenset(clause)
+        if key in seen or any(-lit in key for lit in key):
+            continue
+        seen.add(key)
+        clauses.append(key)
+    report["duplicates_removed"] = len(source) - len(clauses)
+
+    # An empty clause (e.g. a digit above its unknown neighbour count) is a
+    # conflict before any propagation
+    fixed = None if frozenset() in seen else _propagate(clauses)
+    if fixed is None:
+        report["conflict"] = True
+        return None, {}, report
+    clauses = [clause for clause in clauses if clause is not None]
+    report["variables_fixed"] = len(fixed)
+
+    before = len(clauses)
+    clauses = _remove_subsumed(clauses)
+    report["subsumed_removed"] = before - len(clauses)
+
+    simplified = CNF()
+    simplified.nv = nv
+    simplified.clauses = [sorted(clause, key=abs) for clause in clauses]
+    report["variables_before"] = nv
+    report["variables_after"] = len(free_variables(simplified))
+    report["clauses_after"] = len(simplified.clauses)
+    report["literals_after"] = sum(len(c) for c in simplified.clauses)
+    report["clause_ratio"] = report["clauses_after"] / max(report["clauses_before"], 1)
+    report["literal_ratio"] = report["literals_after"] / max(report["literals_before"], 1)
+    report["variable_ratio"] = report["variables_after"] / max(nv, 1)
+    return simplified, fixed, report
+
+def _propagate(clauses):
+    # Unit propagation in place: satisfied clauses become None and shortened
+    # ones are replaced. Returns the fixed assignment, or None on conflict.
+    occurrences = {}
+    for c, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences.setdefault(lit, []).append(c)
+
+    fixed = {}
+    queue = [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    while queue:
+        lit = queue.pop()
+        var = abs(lit)
+        if var in fixed:
+            if fixed[var] != (lit > 0):
+                return None
+            continue
+        fixed[var] = lit > 0
+        for c in occurrences.get(lit, ()):
+            clauses[c] = None
+        for c in occurrences.get(-lit, ()):
+            clause = clauses[c]
+            if clause is None:
+                continue
+            clause = clause - {-lit}
+            if not clause:
+                return None
+            clauses[c] = clause
+            if len(clause) == 1:
+                queue.append(next(iter(clause)))
+    return fixed
+
+def _remove_subsumed(clauses):
+    clauses = sorted(set(clauses), key=len)
+    occurrences = {}
+    for c, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences.setdefault(lit, []).append(c)
+
+    removed = [False] * len(clauses)
+    for c, clause in enumerate(clauses):
+        if removed[c]:
+            continue
+        rarest = min(clause, key=lambda lit: len(occurrences[lit]))
+        for d in occurrences[rarest]:
+            if d != c and not removed[d] and len(clauses[d]) >= len(clause) and clause <= clauses[d]:
+                removed[d] = True
+    return [clause for c, clause in enumerate(clauses) if not removed[c]]
+
+def free_variables(cnf):
+    """Variables still occurring in a (simplified) formula."""
+    return {abs(lit) for clause in cnf.clauses for lit in clause}
+
+def merge_model(model, fixed):
+    """Combine a model of the simplified formula with the fixed assignment."""
+    merged = [lit for lit in model if abs(lit) not in fixed]
+    merged.extend(var if value else -var for var, value in fixed.items())
+    return sorted(merged, key=abs)
+
+def format_report(report):
+    if report.get("conflict"):
+        return "preprocessing: conflict found, the formula is unsatisfiable"
+    return (f"preprocessing: clauses {report['clauses_before']} -> {report['clauses_after']} "
+            f"({report['clause_ratio']:.1%}), literals {report['literals_before']} -> "
+            f"{report['literals_after']} ({report['literal_ratio']:.1%}), variables "
+            f"{report['variables_before']} -> {report['variables_after']} ({report['variable_ratio']:.1%}); "
+            f"{report['variables_fixed']} fixed, {report['duplicates_removed']} duplicate and "
+            f"{report['subsumed_removed']} subsumed clauses removed")
@@ -1,8 +1,14 @@
+import argparse
 import random
 import os
-import copy
-import sys
-import itertools
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+
+import numpy as np
+from pysat.solvers import Solver
+
+from cnf_generator import generate_cnf
+from utils import assign_variables, VariablePool
 
 def get_neighbors(i, j, rows, cols):
     neighbors = []
@@ -13,127 +19,156 @@ def get_neighbors(i, j, rows, cols):
             neighbors.append((x, y))
     return neighbors
 
-def get_next_file_number():
+def neighbor_counts(traps):
     """
-    Count the number of existing files in the testcases directory and return the next number
+    Number of traps around every cell of a boolean trap array, as one
+    vectorized sum of the eight shifted views of the zero-padded array.
     """
-    if not os.path.exists("testcases"):
-        os.makedirs("testcases")
+    rows, cols = traps.shape
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = traps
+    counts = np.zeros((rows, cols), dtype=np.int8)
+    for di in range(3):
+        for dj in range(3):
+            if di != 1 or dj != 1:
+                counts += padded[di:di + rows, dj:dj + cols]
+    return counts
+
+def solution_rows(traps):
+    """Reference solution of a trap layout: T for traps, G for zeros, counts otherwise."""
+    counts = neighbor_counts(traps)
+    return np.where(traps, 'T', np.where(counts == 0, 'G', counts.astype(str))).tolist()
+
+def get_next_file_number(directory="testcases"):
+    """
+    Return the number after the highest existing input_<n>.txt in the
+    testcases directory (counting files would reuse numbers after a gap,
+    e.g. a puzzle that failed to generate, and overwrite later files)
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
         return 1
     
-    files = [f for f in os.listdir("testcases") if f.startswith("input_")]
-    return len(files) + 1
+    numbers = [int(f[len("input_"):-len(".txt")]) for f in os.listdir(directory)
+               if f.startswith("input_") and f.endswith(".txt") and f[len("input_"):-len(".txt")].isdigit()]
+    return max(numbers, default=0) + 1
 
-def is_puzzle_solvable(grid, traps, rows, cols):
+def hide_numbers(grid, traps, rows, cols, num_missing, rng=random):
     """
-    Check if the puzzle is uniquely solvable using a simple backtracking approach
-    Returns: Boolean indicating if solvable, and the solution if found
+    Greedily hide numbers while the puzzle keeps a unique solution.
+
+    Every number cell's constraint (including "this cell is not a trap") is
+    guarded by a selector variable, and one warm solver is kept for the
+    whole loop: a number is visible when its selector is True, forced
+    through assumptions while undecided, so each check is one
+    solve(assumptions=...) call that reuses learned clauses.
+
+    Uniqueness is checked against the known trap layout. Once the board is
+    unique, hiding cell c can only admit a new solution that breaks c's own
+    constraint, i.e. one that differs from `traps` around c; so each step
+    only needs a small guarded "differs near c" clause.
+
+    Returns: List of hidden cells (at most num_missing), or None if the
+    grid is not uniquely solvable even with every number visible
     """
-    # Create a working copy to avoid modifying the original
-    working_grid = copy.deepcopy(grid)
-    solution_found = [False]
-    solutions = []
-    max_solutions = 2  # Stop after finding 2 solutions (we just need to know if it's unique)
-    
-    def is_valid_placement(i, j, is_trap):
-        # Check if placing a trap or non-trap at (i,j) is valid
-        if is_trap:
-            # If this is a trap, all numbers around it should increase by 1
-            for ni, nj in get_neighbors(i, j, rows, cols):
-                # Check if the neighbor is a digit before calling isdigit()
-                if isinstance(working_grid[ni][nj], str) and working_grid[ni][nj].isdigit():
-                    # There's already a number here, we need to check if increasing it would be valid
-                    current_num = int(working_grid[ni][nj])
-                    new_num = current_num + 1
-                    # Count existing traps around this cell
-                    existing_traps = sum(1 for ni2, nj2 in get_neighbors(ni, nj, rows, cols)
-                                      if (ni2, nj2) != (i, j) and 
-                                      isinstance(working_grid[ni2][nj2], bool) and working_grid[ni2][nj2])
-                    # Check if adding this trap would exceed the number
-                    if existing_traps + 1 > current_num:
-                        return False
-        else:
-            # If this is not a trap, check if any surrounding number would become invalid
-            for ni, nj in get_neighbors(i, j, rows, cols):
-                # Check if the neighbor is a digit before calling isdigit()
-                if isinstance(working_grid[ni][nj], str) and working_grid[ni][nj].isdigit():
-                    current_num = int(working_grid[ni][nj])
-                    # Count existing traps around this cell
-                    existing_traps = sum(1 for ni2, nj2 in get_neighbors(ni, nj, rows, cols)
-                                      if (ni2, nj2) != (i, j) and
-                                      isinstance(working_grid[ni2][nj2], bool) and working_grid[ni2][nj2])
-                    # Check if removing a potential trap would make the number invalid
-                    remaining_cells = sum(1 for ni2, nj2 in get_neighbors(ni, nj, rows, cols)
-                                         if (ni2, nj2) != (i, j) and
-                                         not isinstance(working_grid[ni2][nj2], bool))
-                    if existing_traps + remaining_cells < current_num:
-                        return False
-        return True
-    
-    def solve_backtrack(indices):
-        if len(solutions) >= max_solutions:
-            return
-            
-        if not indices:
-            # We've placed all cells, check if this is a valid solution
-            solution = [[False for _ in range(cols)] for _ in range(rows)]
-            for i in range(rows):
-                for j in range(cols):
-                    if isinstance(working_grid[i][j], bool):
-                        solution[i][j] = working_grid[i][j]
-            solutions.append(solution)
-            return
-        
-        i, j = indices[0]
-        remaining = indices[1:]
-        
-        # Try placing a trap
-        if is_valid_placement(i, j, True):
-            working_grid[i][j] = True
-            solve_backtrack(remaining)
-            
-        # Try not placing a trap
-        if is_valid_placement(i, j, False):
-            working_grid[i][j] = False
-            solve_backtrack(remaining)
-            
-        # Backtrack
-        working_grid[i][j] = '_'
-    
-    # Simplified approach for large puzzles: check basic constraints only
-    if rows * cols > 25:  # For larger puzzles, do a basic check
-        # Basic check: ensure that cells with numbers can potentially have that many traps around them
-        for i in range(rows):
-            for j in range(cols):
-                if isinstance(grid[i][j], str) and grid[i][j].isdigit():
-                    number = int(grid[i][j])
-                    neighbors = get_neighbors(i, j, rows, cols)
-                    unknown_neighbors = sum(1 for ni, nj in neighbors if grid[ni][nj] == '_')
-                    known_traps = sum(1 for ni, nj in neighbors if traps[ni][nj])
-                    if known_traps > number or known_traps + unknown_neighbors < number:
-                        return False, None
-        # For large puzzles, we'll assume it's solvable if it passes basic constraints
-        return True, traps
-    
-    # For smaller puzzles, we'll do a full backtracking search
-    # Find all unknown cells
-    unknown_cells = [(i, j) for i in range(rows) for j in range(cols) if grid[i][j] == '_']
-    
-    # Initialize grid with known values
-    for i in range(rows):
-        for j in range(cols):
-            if isinstance(grid[i][j], str) and grid[i][j].isdigit():
-                working_grid[i][j] = grid[i][j]
+    pool = VariablePool()
+    variables = assign_variables(grid, pool, compact=False)
+    numbered_cells = [(i, j) for i in range(rows) for j in range(cols) if grid[i][j].isdigit()]
+    selectors = {cell: pool.new() for cell in numbered_cells}
+    cnf = generate_cnf(grid, variables, pool=pool, selectors=selectors)
+
+    def differs_from_traps(cells):
+        return [-variables[(i, j)] if traps[i][j] else variables[(i, j)] for i, j in cells]
+
+    with Solver(bootstrap_with=cnf.clauses) as solver:
+        order = list(numbered_cells)
+        rng.shuffle(order)
+        # Numbers not yet decided stay visible. Rather than passing one
+        # assumption per number, chain literals link them in shuffled order:
+        # chain[k] implies chain[k+1] and the selector of order[k], so the
+        # single assumption chain[step] keeps every later number visible
+        chain = [pool.new() for _ in order]
+        for k, cell in enumerate(order):
+            solver.add_clause([-chain[k], selectors[cell]])
+            if k + 1 < len(order):
+                solver.add_clause([-chain[k], chain[k + 1]])
+
+        def is_unique(cells, step):
+            # Is there a solution other than `traps` that differs on `cells`?
+            guard = pool.new()
+            solver.add_clause([-guard] + differs_from_traps(cells))
+            unique = not solver.solve(assumptions=chain[step:step + 1] + [guard])
+            solver.add_clause([-guard])  # Retire the check
+            return unique
+
+        if not is_unique(list(variables), 0):
+            return None
+
+        hidden = []
+        for step, (i, j) in enumerate(order, 1):
+            if len(hidden) >= num_missing:
+                break
+            # Decided numbers become unit clauses
+            if is_unique([(i, j)] + get_neighbors(i, j, rows, cols), step):
+                hidden.append((i, j))
+                solver.add_clause([-selectors[(i, j)]])
             else:
-                working_grid[i][j] = '_'
-    
-    # Run backtracking
-    solve_backtrack(unknown_cells)
-    
-    # A puzzle is solvable if it has exactly one solution
-    return len(solutions) == 1, solutions[0] if solutions else None
+                solver.add_clause([selectors[(i, j)]])
+        return hidden
+
+def generate_puzzle(rows, cols, num_missing, trap_probability=0.2, max_attempts=50, maximize=False, rng=random, verbose=False):
+    """
+    Build a uniquely solvable puzzle in memory (steps 1-4 of generate_input_file).
+
+    Parameters:
+    - rows, cols: Grid dimensions
+    - num_missing: Number of numbers to hide
+    - trap_probability: Probability of a cell being a trap
+    - max_attempts: Maximum number of attempts to generate a solvable puzzle
+    - maximize: Hide as many numbers as possible (num_missing is ignored)
+    - rng: Source of randomness; pass random.Random(seed) for reproducible boards
+    - verbose: Print every attempt
+
+    Returns: (grid, traps as a boolean array), or None if every attempt failed
+    """
+    if maximize:
+        num_missing = rows * cols
+
+    for attempt in range(max_attempts):
+        if verbose:
+            print(f"Generating puzzle attempt {attempt+1}/{max_attempts}...")
 
-def generate_input_file(rows, cols=None, num_missing=None, trap_probability=0.2, file_number=None, max_attempts=50):
+        # Step 1: Place traps internally (True means trap), drawn from a
+        # NumPy generator seeded by rng so seeded boards stay reproducible
+        trap_rng = np.random.default_rng(rng.getrandbits(64))
+        traps = trap_rng.random((rows, cols)) < trap_probability
+
+        # Step 2: Calculate number of traps around each cell. Trap cells are
+        # hidden ('_'); zeros start visible too: hidden zero regions have no
+        # constraint and would never be unique, so hide_numbers decides
+        # which zeros can go
+        grid = np.where(traps, '_', neighbor_counts(traps).astype(str)).tolist()
+
+        # Collect all cells that have numbers (digits)
+        numbered_cells = [(i, j) for i in range(rows) for j in range(cols) if grid[i][j].isdigit()]
+
+        if not numbered_cells:
+            # If there are no numbered cells, try again
+            continue
+
+        # Step 3 + 4: Check the full grid is uniquely solvable, then hide
+        # numbers one at a time while it stays that way
+        hidden = hide_numbers(grid, traps, rows, cols, num_missing, rng)
+        if hidden is None or (not maximize and len(hidden) < min(num_missing, len(numbered_cells))):
+            # Not unique, or couldn't hide enough numbers
+            continue
+        for i, j in hidden:
+            grid[i][j] = '_'
+        return grid, traps
+
+    return None
+
+def generate_input_file(rows, cols=None, num_missing=None, trap_probability=0.2, file_number=None, max_attempts=50, maximize=False):
     """
     Generate a rows*cols puzzle grid for gem hunter:
     - Randomly place traps internally (hidden)
@@ -149,6 +184,7 @@ def generate_input_file(rows, cols=None, num_missing=None, trap_probability=0.2,
     - trap_probability: Probability of a cell being a trap
     - file_number: File number for naming (if None, auto-generate)
     - max_attempts: Maximum number of attempts to generate a solvable puzzle
+    - maximize: Hide as many numbers as possible (num_missing is ignored)
     """
     # If cols is not provided, make a square grid
     if cols is None:
@@ -166,93 +202,110 @@ def generate_input_file(rows, cols=None, num_missing=None, trap_probability=0.2,
         os.makedirs("testcases")
     
     # Try to generate a solvable puzzle
-    for attempt in range(max_attempts):
-        print(f"Generating puzzle attempt {attempt+1}/{max_attempts}...")
-        
-        # Step 1: Place traps internally (True means trap)
-        traps = [[random.random() < trap_probability for _ in range(cols)] for _ in range(rows)]
-
-        # Step 2: Calculate number of traps around each cell
-        grid = []
-        for i in range(rows):
-            row = []
-            for j in range(cols):
-                if traps[i][j]:
-                    # Trap cell hidden, output '_'
-                    row.append('_')
-                else:
-                    neighbors = get_neighbors(i, j, rows, cols)
-                    count = sum(1 for (nx, ny) in neighbors if traps[nx][ny])
-                    # Store number as string, '0' will also be shown as '0' (or '_')
-                    row.append(str(count) if count > 0 else '_')
-            grid.append(row)
-
-        # Step 3: Check if the grid is solvable without hiding any numbers
-        solvable, solution = is_puzzle_solvable(grid, traps, rows, cols)
-        if not solvable:
-            continue
-            
-        # Step 4: Only now hide some of the numbers
-        visible_grid = copy.deepcopy(grid)
-        # Collect all cells that have numbers (digits)
-        numbered_cells = [(i, j) for i in range(rows) for j in range(cols) if isinstance(grid[i][j], str) and grid[i][j].isdigit()]
-        
-        if not numbered_cells:
-            # If there are no numbered cells, try again
-            continue
-            
-        # Try different combinations of hidden cells until we find one that's solvable
-        max_hide_attempts = 10
-        for hide_attempt in range(max_hide_attempts):
-            to_hide = random.sample(numbered_cells, min(num_missing, len(numbered_cells)))
-            
-            test_grid = copy.deepcopy(grid)
-            for i, j in to_hide:
-                test_grid[i][j] = '_'
-                
-            # Check if hiding these cells still gives a solvable puzzle
-            still_solvable, _ = is_puzzle_solvable(test_grid, traps, rows, cols)
-            if still_solvable:
-                # We found a good configuration
-                for i, j in to_hide:
-                    grid[i][j] = '_'
-                break
-                
-        if hide_attempt == max_hide_attempts - 1:
-            # Couldn't find a good hiding configuration
+    puzzle = generate_puzzle(rows, cols, num_missing, trap_probability, max_attempts, maximize, verbose=True)
+    if puzzle is None:
+        print(f"Failed to generate a solvable puzzle after {max_attempts} attempts.")
+        print("Try adjusting the trap probability or reduce the number of hidden cells.")
+        return None
+    grid, traps = puzzle
+
+    # Step 5: Write to file
+    input_path = f"testcases/input_{file_number}.txt"
+    solution_path = f"testcases/solution_{file_number}.txt"
+    _write_puzzle(input_path, solution_path, grid, traps)
+    print(f"Generated solvable puzzle saved to {input_path}")
+    print(f"Solution saved to {solution_path}")
+    
+    # Return the file number used
+    return file_number
+
+def _write_puzzle(input_path, solution_path, grid, traps):
+    # Each file is built in memory and written with a single call
+    with open(input_path, "w") as f:
+        f.write(''.join(', '.join(row) + '\n' for row in grid))
+    with open(solution_path, "w") as f:
+        f.write(''.join(', '.join(row) + '\n' for row in solution_rows(traps)))
+
+def puzzle_rng(seed, index):
+    """Deterministic random source of puzzle `index` in a batch seeded with `seed`."""
+    return random.Random(f"{seed}:{index}")
+
+def _generate_chunk(indices, first_number, out_dir, rows, cols, num_missing, trap_probability, seed,
+                    max_attempts, maximize):
+    # Worker task: generate and write a run of puzzles, return the failed indices
+    failed = []
+    for index in indices:
+        puzzle = generate_puzzle(rows, cols, num_missing, trap_probability, max_attempts, maximize,
+                                 rng=puzzle_rng(seed, index))
+        if puzzle is None:
+            failed.append(index)
             continue
-                
-        # Step 5: Write to file
-        input_path = f"testcases/input_{file_number}.txt"
-        with open(input_path, "w") as f:
-            for row in grid:
-                f.write(', '.join(row) + '\n')
-
-        print(f"Generated solvable puzzle saved to {input_path}")
-        
-        # Write solution to a separate file for reference
-        solution_path = f"testcases/solution_{file_number}.txt"
-        with open(solution_path, "w") as f:
-            for i in range(rows):
-                row = []
-                for j in range(cols):
-                    if traps[i][j]:
-                        row.append('T')  # T for trap
-                    else:
-                        neighbors = get_neighbors(i, j, rows, cols)
-                        count = sum(1 for (nx, ny) in neighbors if traps[nx][ny])
-                        if count == 0:
-                            row.append('G')  # G for gem
-                        else:
-                            row.append(str(count))
-                f.write(', '.join(row) + '\n')
-        
-        print(f"Solution saved to {solution_path}")
-        
-        # Return the file number used
-        return file_number
-        
-    # If we get here, we couldn't generate a solvable puzzle
-    print(f"Failed to generate a solvable puzzle after {max_attempts} attempts.")
-    print("Try adjusting the trap probability or reduce the number of hidden cells.")
-    return None
\ No newline at end of file
+        grid, traps = puzzle
+        number = first_number + index
+        _write_puzzle(os.path.join(out_dir, f"input_{number}.txt"),
+                      os.path.join(out_dir, f"solution_{number}.txt"), grid, traps)
+    return failed
+
+def generate_batch(count, rows, cols=None, num_missing=None, trap_probability=0.2, seed=0,
+                   out_dir="testcases", first_number=None, jobs=None, max_attempts=50, maximize=False):
+    """
+    Generate `count` puzzles across a process pool.
+
+    Puzzle k uses puzzle_rng(seed, k), so a batch is reproducible whatever
+    the number of workers, and is written to input_<first_number + k>.txt
+    and solution_<first_number + k>.txt in out_dir. Workers take runs of
+    puzzles per task and write their own files, so nothing but the failed
+    indices travels back to this process.
+
+    Returns: {"generated": n, "failed": [indices], "seconds": s}
+    """
+    cols = cols or rows
+    if num_missing is None:
+        num_missing = int(rows * cols * 0.2)
+    os.makedirs(out_dir, exist_ok=True)
+    if first_number is None:
+        first_number = get_next_file_number(out_dir)
+    jobs = jobs or os.cpu_count() or 1
+
+    # A few tasks per worker keeps them busy without a round trip per puzzle
+    chunk = max(1, min(64, -(-count // (4 * jobs))))
+    chunks = [range(lo, min(lo + chunk, count)) for lo in range(0, count, chunk)]
+    params = (first_number, out_dir, rows, cols, num_missing, trap_probability, seed, max_attempts, maximize)
+
+    start = time()
+    failed = []
+    if jobs == 1:
+        for indices in chunks:
+            failed += _generate_chunk(indices, *params)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_generate_chunk, indices, *params) for indices in chunks]
+            for future in futures:
+                failed += future.result()
+    return {"generated": count - len(failed), "failed": failed, "seconds": time() - start}
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="main.py --gen", description="Generate uniquely solvable puzzles.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("cols", type=int, nargs="?", default=None, help="Columns (default: rows)")
+    parser.add_argument("--count", type=int, default=1, help="Number of puzzles")
+    parser.add_argument("--seed", type=int, default=None, help="Batch seed (default: random)")
+    parser.add_argument("--missing", default=None,
+                        help="Numbers to hide per puzzle (default: 20%% of cells, 'max' for as many as possible)")
+    parser.add_argument("--trap-prob", type=float, default=0.2)
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out-dir", default="testcases")
+    parser.add_argument("--first", type=int, default=None,
+                        help="Number of the first file (default: next free number)")
+    args = parser.parse_args(argv)
+
+    maximize = args.missing == "max"
+    num_missing = int(args.missing) if args.missing and not maximize else None
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    summary = generate_batch(args.count, args.rows, args.cols, num_missing, args.trap_prob, seed,
+                             args.out_dir, args.first, args.jobs, maximize=maximize)
+    print(f"Generated {summary['generated']} of {args.count} puzzles in {summary['seconds']:.2f} seconds "
+          f"(seed {seed})")
+    if summary["failed"]:
+        print(f"Failed: {', '.join(map(str, summary['failed']))}")
+    return 0
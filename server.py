@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+
+from cnf_generator import generate_cnf
+from solvers import REGISTRY, get_solver, pick_solver, run
+from utils import assign_variables, interpret_model, solver_variables
+
+# Boards with at most this many cells are micro-batched into one pool task
+SMALL_BOARD_CELLS = 400
+BATCH_SIZE = 32
+BATCH_WINDOW = 0.005  # seconds to wait for a batch to fill
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+               503: "Service Unavailable", 504: "Gateway Timeout"}
+
+def solve_board(grid, solver_name="pysat"):
+    """
+    Solve one board (list of rows of cell strings) in the calling process.
+
+    Returns: JSON-serialisable result with status and, when solved, the
+    solution grid; status "rejected" when the solver does not fit the board
+    """
+    try:
+        variables = assign_variables(grid)
+        cnf = decision = None
+        if solver_name == "auto" or REGISTRY[solver_name].kind == "cnf":
+            cnf = generate_cnf(grid, variables)
+            decision = solver_variables(variables, cnf)
+            if solver_name == "auto":
+                solver_name = pick_solver(len(decision))
+            entry = REGISTRY[solver_name]
+            if not entry.fits(len(decision)):
+                return {"status": "rejected",
+                        "error": f"{solver_name} is practical up to {entry.max_vars} variables, "
+                                 f"this board has {len(decision)}"}
+        model = run(solver_name, grid, variables, cnf, decision)
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+    if model is None:
+        return {"status": "unsat"}
+    return {"status": "solved", "solution": interpret_model(grid, variables, model)}
+
+def _solve_loop(conn):
+    for entry in REGISTRY.values():
+        entry.load()
+    while True:
+        try:
+            grid, solver_name = conn.recv()
+        except EOFError:
+            break
+        conn.send(solve_board(grid, solver_name))
+
+# Each pool worker hands its boards to a child process of its own, which it
+# kills when a board overruns its deadline (and replaces on the next board),
+# so a timeout frees the worker instead of leaving it to finish the solve
+_solver = None
+
+def _start_solver():
+    global _solver
+    conn, child_conn = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_solve_loop, args=(child_conn,), daemon=True)
+    process.start()
+    child_conn.close()
+    _solver = (process, conn)
+
+def _stop_solver():
+    global _solver
+    process, conn = _solver
+    process.kill()
+    process.join()
+    conn.close()
+    _solver = None
+
+def solve_many(jobs):
+    """
+    Solve (grid, solver name, deadline) jobs in order; deadline is a
+    time.time() value, and a board still unsolved then gets status "timeout".
+    """
+    results = []
+    for grid, solver_name, deadline in jobs:
+        if time() >= deadline:
+            results.append({"status": "timeout"})
+            continue
+        if _solver is None:
+            _start_solver()
+        process, conn = _solver
+        conn.send((grid, solver_name))
+        if conn.poll(max(0.0, deadline - time())):
+            try:
+                results.append(conn.recv())
+                continue
+            except EOFError:
+                result = {"status": "error", "error": "solver process died"}
+        else:
+            result = {"status": "timeout"}
+        _stop_solver()
+        results.append(result)
+    return results
+
+def _warm_up():
+    # Runs once per worker so the solver modules (imported lazily by the
+    # registry) and their native libraries are loaded, and the solving child
+    # started, before the first real request arrives
+    for entry in REGISTRY.values():
+        entry.load()
+    solve_many([([["1", "_"]], "pysat", time() + 60)])
+    return os.getpid()
+
+def parse_grid(payload):
+    """Accept {"grid": [[...], ...]} or {"board": "1, _\\n_, 2"}."""
+    if "grid" in payload:
+        grid = [[str(cell).strip() for cell in row] for row in payload["grid"]]
+    elif "board" in payload:
+        grid = [[cell.strip() for cell in line.split(",")]
+                for line in payload["board"].splitlines() if line.strip()]
+    else:
+        raise ValueError("request needs a 'grid' or 'board' field")
+    if not grid or not grid[0] or any(len(row) != len(grid[0]) for row in grid):
+        raise ValueError("grid must be a non-empty rectangle")
+    for row in grid:
+        for cell in row:
+            if cell != "_" and not cell.isdigit():
+                raise ValueError(f"invalid cell {cell!r}")
+    return grid
+
+class SolveService:
+    """
+    Asyncio front end over a warm process pool.
+
+    Small boards are collected for BATCH_WINDOW seconds and handed to the
+    pool in batches of at most BATCH_SIZE, spread over the workers, which
+    amortizes the inter-process round trip; larger boards get a task each.
+    Workers solve in a child process they kill at the request's deadline,
+    so an expired board stops using its worker. At most max_pending boards
+    are in the pool at once; beyond that the server answers 503 straight
+    away instead of queueing without bound.
+    """
+    def __init__(self, jobs=None, max_pending=256, timeout=30.0):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0  # boards submitted to the pool and not finished yet
+        self.executor = None
+        self.batch = []
+        self.batch_ready = None
+        self.batcher = None
+        self.served = 0
+        self.rejected = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(max_workers=self.jobs)
+        # Submitting one warm-up task per worker forks the whole pool now
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.jobs)))
+        self.batch_ready = asyncio.Event()
+        self.batcher = asyncio.create_task(self._run_batches())
+
+    async def stop(self):
+        if self.batcher is not None:
+            self.batcher.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_batches(self):
+        while True:
+            await self.batch_ready.wait()
+            await asyncio.sleep(BATCH_WINDOW)
+            # Spread what arrived over the workers rather than queueing it
+            # all on one of them
+            size = min(BATCH_SIZE, max(1, -(-len(self.batch) // self.jobs)))
+            while self.batch:
+                batch, self.batch = self.batch[:size], self.batch[size:]
+                self._submit(batch)
+            self.batch_ready.clear()
+
+    def _submit(self, batch):
+        task = asyncio.get_running_loop().run_in_executor(self.executor, solve_many, [job for job, _ in batch])
+        task.add_done_callback(lambda done: self._finish_batch(done, batch))
+
+    def _finish_batch(self, done, batch):
+        self.pending -= len(batch)
+        if done.cancelled():
+            return
+        if done.exception() is not None:
+            results = [{"status": "error", "error": str(done.exception())}] * len(batch)
+        else:
+            results = done.result()
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def solve(self, grid, solver_name, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job = ((grid, solver_name, time() + timeout), future)
+        if len(grid) * len(grid[0]) <= SMALL_BOARD_CELLS:
+            self.batch.append(job)
+            self.batch_ready.set()
+        else:
+            self._submit([job])
+        try:
+            # shield: a timeout must not cancel the future, so its callback
+            # still releases the board when the worker gives up on it
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # The worker stops at the same deadline and frees its slot
+            return {"status": "timeout"}
+
+    async def handle(self, method, path, body):
+        """Returns (HTTP status, JSON-serialisable response)."""
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "workers": self.jobs, "pending": self.pending,
+                         "served": self.served, "rejected": self.rejected}
+        if path != "/solve" or method != "POST":
+            return 404, {"error": "POST /solve or GET /health"}
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return 503, {"error": "server busy"}
+
+        try:
+            payload = json.loads(body)
+            grid = parse_grid(payload)
+            solver_name = payload.get("solver", "pysat")
+            if solver_name != "auto":
+                get_solver(solver_name)
+            timeout = float(payload.get("timeout", self.timeout))
+        except (ValueError, TypeError, AttributeError) as e:
+            return 400, {"error": str(e)}
+
+        # Released by _finish_batch once the pool is done with it
+        self.pending += 1
+        result = await self.solve(grid, solver_name, timeout)
+        if result["status"] == "rejected":
+            return 400, {"error": result["error"]}
+        self.served += 1
+        return (504 if result["status"] == "timeout" else 200), result
+
+    async def serve_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive; one request at a time per connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be framed, so the connection is closed
+                    status, response = 400, {"error": "invalid Content-Length"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, response = 413, {"error": "request too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = await self.handle(method, path, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                data = json.dumps(response).encode()
+                head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                        f"Content-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+                if status == 503:
+                    head += "Retry-After: 1\r\n"
+                writer.write(head.encode() + b"\r\n" + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, jobs=None, max_pending=256, timeout=30.0):
+    service = SolveService(jobs, max_pending, timeout)
+    await service.start()
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(service.serve_connection, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Serving on {where} with {service.jobs} workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP solve service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="Boards in the pool at once before answering 503")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Default per-request timeout in seconds")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.jobs, args.max_pending, args.timeout))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
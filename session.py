@@ -0,0 +1,76 @@
+from pysat.solvers import Solver
+
+from backbone import solver_backbone, cell_marks
+from cnf_generator import generate_cnf
+from utils import assign_variables, interpret_model, read_input_file, VariablePool
+
+class GameSession:
+    """
+    A board being played, with one warm incremental solver.
+
+    Every cell gets a variable up front (compact=False), so a reveal only
+    has to add clauses: a unit clause for the cell itself and, for a number,
+    the constraints of that one number cell. The solver keeps its learned
+    clauses between moves, and cells proven forced stay forced (reveals only
+    add constraints), so each move costs roughly the same however long the
+    game has been going.
+    """
+    def __init__(self, grid, solver_name="m22"):
+        self.grid = [list(row) for row in grid]
+        self.pool = VariablePool()
+        self.variables = assign_variables(self.grid, self.pool, compact=False)
+        cnf = generate_cnf(self.grid, self.variables, pool=self.pool)
+        self.solver = Solver(name=solver_name, bootstrap_with=cnf.clauses)
+        self.forced = {}  # var -> value proven for every solution so far
+
+    @classmethod
+    def from_file(cls, filepath, solver_name="m22"):
+        return cls(read_input_file(filepath), solver_name)
+
+    def reveal(self, i, j, value):
+        """
+        Record what cell (i, j) turned out to be: a digit, 'T' or 'G'.
+
+        Raises ValueError if the cell was already revealed or the value is
+        not one of those.
+        """
+        value = str(value).strip()
+        if self.grid[i][j] != '_':
+            raise ValueError(f"Cell ({i}, {j}) is already revealed")
+        var = self.variables[(i, j)]
+        if value.isdigit():
+            self.grid[i][j] = value
+            for clause in generate_cnf(self.grid, self.variables, pool=self.pool, cells=[(i, j)]).clauses:
+                self.solver.add_clause(clause)
+        elif value in ('T', 'G'):
+            self.grid[i][j] = value
+            self.solver.add_clause([var if value == 'T' else -var])
+        else:
+            raise ValueError(f"Invalid cell value: {value!r}")
+
+    def solve(self):
+        """Return a solution grid (as interpret_model does), or None if the board is inconsistent."""
+        if not self.solver.solve():
+            return None
+        return interpret_model(self.grid, self.variables, self.solver.get_model())
+
+    def forced_cells(self):
+        """
+        Map unknown and revealed non-number cells to 'T'/'G' when forced and
+        '?' when free; None if the board is inconsistent.
+        """
+        unknown = [var for (i, j), var in self.variables.items() if not self.grid[i][j].isdigit()]
+        backbone = solver_backbone(self.solver, unknown, self.forced)
+        if backbone is None:
+            return None
+        self.forced = backbone
+        return cell_marks(self.grid, self.variables, backbone)
+
+    def close(self):
+        self.solver.delete()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,27 +1,127 @@
-from utils import is_cnf_satisfied, is_partial_cnf_valid
+import instrumentation
 
-def solver_backtracking(cnf, variables):
-    def backtrack(index, assignment):
-        if index == len(variables):
-            if is_cnf_satisfied(cnf, assignment):
-                return assignment
-            return None
+def solver_backtracking(cnf, variables, stats=None):
+    """
+    Backtracking search with incremental clause bookkeeping.
 
-        var = variables[index]
+    Every clause keeps a counter of satisfied literals and of unassigned
+    literals, updated through a literal -> clause occurrence index, so a
+    node only touches the clauses containing the variable it assigns.
+    Unsatisfied clauses are bucketed by their unassigned count; branching
+    picks a variable from the smallest bucket (most constrained first) and
+    tries the value that satisfies that clause before the other one.
+    Variables that appear in clauses but not in `variables` are fixed False.
 
-        assignment[var] = True
-        if is_partial_cnf_valid(cnf, assignment):
-            result = backtrack(index + 1, assignment)
-            if result: return result
+    With stats (or an active instrumentation collector), the number of
+    search nodes, backtracks and clause counter updates is recorded.
+    """
+    stats = stats if stats is not None else instrumentation.ACTIVE
+    # Work on dense local IDs so the per-variable arrays stay small even when
+    # the caller's IDs are sparse (e.g. one component of a large board)
+    local = {}
+    for var in variables:
+        local.setdefault(var, len(local) + 1)
+    searched = len(local)
+    clauses = []
+    for clause in cnf:
+        clauses.append([local.setdefault(abs(lit), len(local) + 1) * (1 if lit > 0 else -1)
+                        for lit in clause])
+    top = len(local)
 
-        assignment[var] = False
-        if is_partial_cnf_valid(cnf, assignment):
-            result = backtrack(index + 1, assignment)
-            if result: return result
+    pos_occ = [[] for _ in range(top + 1)]
+    neg_occ = [[] for _ in range(top + 1)]
+    for c, clause in enumerate(clauses):
+        for lit in clause:
+            (pos_occ if lit > 0 else neg_occ)[abs(lit)].append(c)
 
-        del assignment[var]
+    value = [0] * (top + 1)  # 1 = True, -1 = False, 0 = unassigned
+    sat = [0] * len(clauses)
+    unassigned = [len(clause) for clause in clauses]
+    max_len = max(unassigned, default=0)
+    # buckets[u]: unsatisfied clauses with u unassigned literals; buckets[0] are conflicts
+    buckets = [set() for _ in range(max_len + 1)]
+    for c, u in enumerate(unassigned):
+        buckets[u].add(c)
+
+    def assign(var, val):
+        value[var] = 1 if val else -1
+        true_occ, false_occ = (pos_occ[var], neg_occ[var]) if val else (neg_occ[var], pos_occ[var])
+        for c in true_occ:
+            if sat[c] == 0:
+                buckets[unassigned[c]].discard(c)
+            sat[c] += 1
+            unassigned[c] -= 1
+        for c in false_occ:
+            u = unassigned[c]
+            unassigned[c] = u - 1
+            if sat[c] == 0:
+                buckets[u].discard(c)
+                buckets[u - 1].add(c)
+
+    def unassign(var):
+        val = value[var] == 1
+        value[var] = 0
+        true_occ, false_occ = (pos_occ[var], neg_occ[var]) if val else (neg_occ[var], pos_occ[var])
+        for c in false_occ:
+            u = unassigned[c]
+            unassigned[c] = u + 1
+            if sat[c] == 0:
+                buckets[u].discard(c)
+                buckets[u + 1].add(c)
+        for c in true_occ:
+            sat[c] -= 1
+            unassigned[c] += 1
+            if sat[c] == 0:
+                buckets[unassigned[c]].add(c)
+
+    def pick_branch():
+        # Most constrained unsatisfied clause, then its first free literal
+        for u in range(1, max_len + 1):
+            if buckets[u]:
+                clause = clauses[next(iter(buckets[u]))]
+                for lit in clause:
+                    if value[abs(lit)] == 0:
+                        return abs(lit), lit > 0
         return None
 
-    assignment = {}
-    result = backtrack(0, assignment)
-    return [v if result[v] else -v for v in variables] if result else None
+    # Variables outside the search space are False, as in is_cnf_satisfied
+    for var in range(searched + 1, top + 1):
+        assign(var, False)
+
+    def report():
+        stats.count("nodes", nodes)
+        stats.count("backtracks", backtracks)
+        stats.count("clause_updates", updates)
+
+    # Undo trail of decisions: (var, first value tried, second value tried?)
+    trail = []
+    nodes = backtracks = updates = 0
+    while True:
+        if buckets[0]:
+            # Conflict: flip the most recent decision that still has a value left
+            backtracks += 1
+            while trail:
+                var, val, flipped = trail.pop()
+                unassign(var)
+                if not flipped:
+                    trail.append((var, val, True))
+                    assign(var, not val)
+                    updates += len(pos_occ[var]) + len(neg_occ[var])
+                    break
+            else:
+                if stats is not None:
+                    report()
+                return None
+            continue
+
+        branch = pick_branch()
+        if branch is None:
+            if stats is not None:
+                report()
+            # Every clause is satisfied; remaining free variables default to False
+            return [v if value[local[v]] == 1 else -v for v in variables]
+        var, val = branch
+        nodes += 1
+        updates += len(pos_occ[var]) + len(neg_occ[var])
+        trail.append((var, val, False))
+        assign(var, val)
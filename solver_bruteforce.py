@@ -1,9 +1,192 @@
-from itertools import product
-from utils import is_cnf_satisfied
-
-def solver_bruteforce(cnf, variables):
-    for values in product([True, False], repeat=len(variables)):
-        assignment = dict(zip(variables, values))
-        if is_cnf_satisfied(cnf, assignment):
-            return [v if assignment[v] else -v for v in variables]
-    return None
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+import instrumentation
+from flat_cnf import FlatCNF
+
+# Assignments per block = 2**BLOCK_BITS, packed 64 to a uint64 word
+BLOCK_BITS = 16
+
+# Bit b of lane p (p < 64) inside a word: lanes whose index has bit b set
+_WORD_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+]
+
+_ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+class _BlockEvaluator:
+    """
+    Evaluates a CNF over blocks of 2**block_bits assignments at once.
+
+    Lane L of block h is the assignment whose variable b is bit b of
+    (h << block_bits) | L. The low variables have the same bit pattern in
+    every block, so each clause's low part is OR-ed into a mask once up
+    front; per block only the high variables (constant within the block)
+    decide whether a clause is already satisfied or contributes its mask.
+    """
+    def __init__(self, clauses, n, block_bits):
+        self.n = n
+        self.bits = min(n, block_bits)
+        words = 1 << max(self.bits - 6, 0)
+        valid = np.full(words, _ALL_ONES, dtype=np.uint64)
+        if self.bits < 6:
+            valid[0] = np.uint64((1 << (1 << self.bits)) - 1)
+
+        patterns = []
+        for b in range(self.bits):
+            if b < 6:
+                patterns.append(np.full(words, np.uint64(_WORD_PATTERNS[b]), dtype=np.uint64))
+            else:
+                on = (np.arange(words) >> (b - 6)) & 1
+                patterns.append(np.where(on == 1, _ALL_ONES, np.uint64(0)))
+
+        # Clauses without high variables fold into one constant base mask
+        self.base = valid
+        self.high_clauses = []
+        self.blocks_searched = 0
+        self.clause_checks = 0
+        for clause in clauses:
+            low = np.zeros(words, dtype=np.uint64)
+            high = []
+            for b, positive in clause:
+                if b < self.bits:
+                    low |= patterns[b] if positive else ~patterns[b]
+                else:
+                    high.append((b - self.bits, positive))
+            if high:
+                self.high_clauses.append((high, low))
+            else:
+                self.base = self.base & low
+
+    def blocks(self):
+        return 1 << (self.n - self.bits)
+
+    def search(self, start, stop, stop_event=None):
+        """Return the first satisfying assignment index in blocks [start, stop)."""
+        if not self.base.any():
+            return None
+        checks = searched = 0
+        found = None
+        for h in range(start, stop):
+            if stop_event is not None and stop_event.is_set():
+                break
+            searched += 1
+            acc = self.base
+            for high, low in self.high_clauses:
+                checks += 1
+                if any(((h >> b) & 1) == positive for b, positive in high):
+                    continue
+                acc = acc & low
+                if not acc.any():
+                    break
+            else:
+                word = int(np.flatnonzero(acc)[0])
+                lanes = int(acc[word])
+                lane = word * 64 + (lanes & -lanes).bit_length() - 1
+                found = (h << self.bits) | lane
+                break
+        self.blocks_searched += searched
+        self.clause_checks += checks
+        return found
+
+def _index_clauses(cnf, variables):
+    # Clauses as (bit index, polarity) pairs over the enumerated variables
+    index = {var: b for b, var in enumerate(variables)}
+    clauses = []
+    for clause in cnf:
+        lits = []
+        for lit in clause:
+            b = index.get(abs(lit))
+            if b is None:
+                if lit < 0:
+                    break  # Unlisted variables are False, so -var holds
+                continue
+            lits.append((b, lit > 0))
+        else:
+            clauses.append(lits)
+    return clauses
+
+_worker_evaluator = None
+_worker_stop = None
+
+def _init_worker(handle, variables, block_bits, stop_event):
+    global _worker_evaluator, _worker_stop
+    # The formula arrives through shared memory rather than being pickled
+    flat = FlatCNF.attach(handle)
+    clauses = _index_clauses(flat, variables)
+    flat.close()
+    _worker_evaluator = _BlockEvaluator(clauses, len(variables), block_bits)
+    _worker_stop = stop_event
+
+def _search_range(start, stop):
+    found = _worker_evaluator.search(start, stop, _worker_stop)
+    if found is not None:
+        _worker_stop.set()
+    return found
+
+def solver_bruteforce(cnf, variables, block_bits=BLOCK_BITS, processes=1, stats=None):
+    """
+    Exhaustive search over all 2**n assignments, bit-sliced with NumPy.
+
+    Args:
+        cnf: Clauses to satisfy
+        variables: Variables to enumerate; any other variable is False
+        block_bits: log2 of the assignments evaluated per block
+        processes: Worker processes; above 1 the blocks are split by their
+            high-order bits across a process pool (None = CPU count)
+        stats: SolverStats to report blocks and clause checks to (defaults to
+            the active collector; not collected from worker processes)
+
+    Returns:
+        The first satisfying model found, or None
+    """
+    stats = stats if stats is not None else instrumentation.ACTIVE
+    n = len(variables)
+    blocks = 1 << (n - min(n, block_bits))
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes <= 1 or blocks < 2:
+        evaluator = _BlockEvaluator(_index_clauses(cnf, variables), n, block_bits)
+        found = evaluator.search(0, blocks)
+        if stats is not None:
+            stats.count("nodes", evaluator.blocks_searched << evaluator.bits)
+            stats.count("blocks", evaluator.blocks_searched)
+            stats.count("clause_checks", evaluator.clause_checks)
+    else:
+        found = None
+        stop_event = multiprocessing.Event()
+        flat = cnf if isinstance(cnf, FlatCNF) else FlatCNF.from_clauses(cnf)
+        shared = flat.share()
+        # The segment must be released even if the pool fails
+        try:
+            # Several ranges per worker so an early hit cancels most of the work
+            step = max(1, blocks // (processes * 4))
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(shared.handle(), list(variables), block_bits, stop_event)) as executor:
+                pending = {executor.submit(_search_range, start, min(start + step, blocks))
+                           for start in range(0, blocks, step)}
+                while pending and found is None:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.result() is not None:
+                            found = future.result()
+                            break
+                stop_event.set()
+                for future in pending:
+                    future.cancel()
+        finally:
+            shared.close()
+            shared.unlink()
+
+    if found is None:
+        return None
+    return [v if (found >> b) & 1 else -v for b, v in enumerate(variables)]
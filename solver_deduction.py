@@ -0,0 +1,199 @@
+from utils import get_neighbors
+
+UNKNOWN, TRAP, GEM = 0, 1, -1
+
+def solver_deduction(grid, variables):
+    """
+    Solve the board directly on the grid, without building a CNF.
+
+    Each number cell keeps a counter of placed traps and of unknown
+    neighbours. Deductions run to a fixpoint:
+    - all remaining neighbours are traps (remaining count == unknowns)
+    - all remaining neighbours are gems (remaining count == 0)
+    - subset/difference rules between two overlapping number cells
+    The search only branches when deduction stalls, undoing through a trail.
+    Cells with no numbered neighbour are gems.
+
+    Args:
+        grid: 2D grid as returned by read_input_file
+        variables: Dictionary mapping cell coordinates to variable IDs
+
+    Returns:
+        Model over the variables (same format as the CNF solvers), or None
+    """
+    rows, cols = len(grid), len(grid[0])
+    size = rows * cols
+
+    state = [UNKNOWN] * size
+    numbers = []  # flat positions of number cells
+    target = []   # k of each number cell
+    for i in range(rows):
+        for j in range(cols):
+            if grid[i][j].isdigit():
+                state[i * cols + j] = GEM
+                numbers.append(i * cols + j)
+                target.append(int(grid[i][j]))
+
+    # Static neighbourhoods: number -> unknown cells, unknown cell -> numbers
+    around = []
+    numbers_of = [[] for _ in range(size)]
+    for n, p in enumerate(numbers):
+        cells = [x * cols + y for x, y in get_neighbors(p // cols, p % cols, rows, cols)
+                 if state[x * cols + y] == UNKNOWN]
+        around.append(cells)
+        for q in cells:
+            numbers_of[q].append(n)
+
+    placed = [0] * len(numbers)
+    unknown = [len(cells) for cells in around]
+    trail = []
+    scan = [0]  # every number cell before scan[0] has no unknown neighbours
+    queue = []
+    dirty = set(range(len(numbers)))
+
+    def broken(n):
+        remaining = target[n] - placed[n]
+        return remaining < 0 or remaining > unknown[n]
+
+    def set_cell(p, value):
+        # Returns False if some number cell can no longer be satisfied
+        state[p] = value
+        trail.append(p)
+        ok = True
+        for n in numbers_of[p]:
+            unknown[n] -= 1
+            if value == TRAP:
+                placed[n] += 1
+            if broken(n):
+                ok = False
+            queue.append(n)
+            dirty.add(n)
+        return ok
+
+    def undo(mark):
+        while len(trail) > mark:
+            p = trail.pop()
+            for n in numbers_of[p]:
+                scan[0] = min(scan[0], n)
+                unknown[n] += 1
+                if state[p] == TRAP:
+                    placed[n] -= 1
+            state[p] = UNKNOWN
+
+    def fill(cells, value):
+        for q in cells:
+            if state[q] == UNKNOWN and not set_cell(q, value):
+                return False
+        return True
+
+    def propagate_counts():
+        while queue:
+            n = queue.pop()
+            if unknown[n] == 0:
+                continue
+            remaining = target[n] - placed[n]
+            if remaining == 0:
+                if not fill(around[n], GEM):
+                    return False
+            elif remaining == unknown[n]:
+                if not fill(around[n], TRAP):
+                    return False
+        return True
+
+    def pair_rules():
+        # Returns (ok, progress) after applying subset/difference deductions
+        progress = False
+        while dirty:
+            n = dirty.pop()
+            if unknown[n] == 0:
+                continue
+            a = {q for q in around[n] if state[q] == UNKNOWN}
+            partners = {m for q in a for m in numbers_of[q] if m != n and unknown[m] > 0}
+            for m in partners:
+                b = {q for q in around[m] if state[q] == UNKNOWN}
+                shared = a & b
+                only_a, only_b = a - shared, b - shared
+                rem_a, rem_b = target[n] - placed[n], target[m] - placed[m]
+                s_min = max(0, rem_a - len(only_a), rem_b - len(only_b))
+                s_max = min(len(shared), rem_a, rem_b)
+                if s_min > s_max:
+                    return False, progress
+                for only, rem in ((only_a, rem_a), (only_b, rem_b)):
+                    if not only:
+                        continue
+                    if rem - s_max == len(only):
+                        value = TRAP
+                    elif rem - s_min == 0:
+                        value = GEM
+                    else:
+                        continue
+                    progress = True
+                    if not fill(only, value):
+                        return False, progress
+                if progress:
+                    dirty.add(n)  # Other partners of n may still yield deductions
+                    return True, progress
+        return True, progress
+
+    def deduce():
+        while True:
+            if not propagate_counts():
+                return False
+            ok, progress = pair_rules()
+            if not ok:
+                return False
+            if not progress:
+                return True
+
+    def pick_branch(mark):
+        # Stay local: prefer the tightest number cell touched since `mark`,
+        # so decisions sweep one region instead of hopping across the board
+        best = None
+        for p in trail[mark:]:
+            for n in numbers_of[p]:
+                if unknown[n] and (best is None or unknown[n] < unknown[best]):
+                    best = n
+        if best is None:
+            while scan[0] < len(numbers) and not unknown[scan[0]]:
+                scan[0] += 1
+            if scan[0] == len(numbers):
+                return None
+            best = scan[0]
+        p = next(q for q in around[best] if state[q] == UNKNOWN)
+        likely_trap = 2 * (target[best] - placed[best]) >= unknown[best]
+        return p, TRAP if likely_trap else GEM
+
+    if any(broken(n) for n in range(len(numbers))):
+        return None
+    queue.extend(range(len(numbers)))
+
+    # Branch stack: (trail mark, cell, value tried, other value already tried?)
+    stack = []
+    ok = deduce()
+    while True:
+        if ok:
+            branch = pick_branch(stack[-1][0] if stack else len(trail))
+            if branch is None:
+                break
+            p, value = branch
+            stack.append((len(trail), p, value, False))
+            ok = set_cell(p, value) and deduce()
+            continue
+
+        # Conflict: revert to the latest branch with an untried value
+        queue.clear()
+        dirty.clear()
+        while stack:
+            mark, p, value, flipped = stack.pop()
+            undo(mark)
+            if not flipped:
+                stack.append((mark, p, -value, True))
+                ok = set_cell(p, -value) and deduce()
+                break
+        else:
+            return None
+
+    model = []
+    for (i, j), var in variables.items():
+        model.append(var if state[i * cols + j] == TRAP else -var)
+    return model
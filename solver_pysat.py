@@ -1,7 +1,21 @@
+import instrumentation
 from pysat.solvers import Solver
 
-def solver_pysat(cnf, variables):
-    with Solver(bootstrap_with=cnf.clauses) as solver:
-        if solver.solve():
+def solver_pysat(cnf, variables, stats=None):
+    stats = stats if stats is not None else instrumentation.ACTIVE
+    if hasattr(cnf, "clauses"):
+        solver = Solver(bootstrap_with=cnf.clauses)
+    else:
+        # A clause stream (e.g. generate_cnf(..., stream=True)): feed it
+        # clause by clause so the formula is never materialized in Python
+        solver = Solver()
+        for clause in cnf:
+            solver.add_clause(clause)
+    with solver:
+        satisfiable = solver.solve()
+        if stats is not None:
+            # conflicts, decisions, propagations and restarts
+            stats.solver.update(solver.accum_stats())
+        if satisfiable:
             return solver.get_model()
         return None
@@ -0,0 +1,91 @@
+import importlib
+
+class SolverEntry:
+    """
+    One registered solver, imported on first use.
+
+    kind: "cnf" for (cnf, variables) solvers, "grid" for (grid, variables)
+        solvers that build their own formula or none at all
+    complete: finds a model whenever one exists (and proves unsat otherwise)
+    incremental: keeps one warm SAT solver across its solve calls
+    max_vars: largest number of decision variables it is practical for
+        (None: no practical limit)
+    """
+    def __init__(self, name, label, module, function, kind="cnf", complete=True,
+                 incremental=False, max_vars=None, compare=False):
+        self.name = name
+        self.label = label
+        self.module = module
+        self.function = function
+        self.kind = kind
+        self.complete = complete
+        self.incremental = incremental
+        self.max_vars = max_vars
+        self.compare = compare  # offered in the menu's comparison modes
+        self._func = None
+
+    def load(self):
+        if self._func is None:
+            self._func = getattr(importlib.import_module(self.module), self.function)
+        return self._func
+
+    def fits(self, num_vars):
+        return self.max_vars is None or num_vars <= self.max_vars
+
+    def __call__(self, *args):
+        return self.load()(*args)
+
+REGISTRY = {entry.name: entry for entry in (
+    SolverEntry("pysat", "PySAT", "solver_pysat", "solver_pysat", incremental=True, compare=True),
+    SolverEntry("bruteforce", "Brute-force", "solver_bruteforce", "solver_bruteforce", max_vars=28,
+                compare=True),
+    SolverEntry("backtracking", "Backtracking", "solver_backtracking", "solver_backtracking",
+                max_vars=5000, compare=True),
+    SolverEntry("portfolio", "Portfolio", "portfolio", "solver_portfolio"),
+    SolverEntry("deduction", "Deduction", "solver_deduction", "solver_deduction", kind="grid"),
+    SolverEntry("decomposed", "Decomposed", "decomposition", "solver_decomposed", kind="grid"),
+    SolverEntry("lazy", "Lazy", "lazy", "solver_lazy", kind="grid", incremental=True),
+)}
+
+SOLVER_NAMES = tuple(REGISTRY)
+
+# Automatic choice, cheapest first: (solver, largest formula it is picked
+# for). Over ~3600 random consistent boards of up to 24 decision variables
+# backtracking took at most 6 ms, less than importing PySAT cold (~30 ms);
+# past that its worst case grows quickly (seconds from ~130 variables)
+# while PySAT stays around a millisecond.
+AUTO = (("backtracking", 24), ("pysat", None))
+
+def get_solver(name):
+    """Registry entry for `name`; raises ValueError for unknown solvers."""
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown solver: {name}. Choose from {', '.join(SOLVER_NAMES)}.") from None
+
+def pick_solver(num_vars, incremental=False):
+    """
+    Name of the cheapest complete solver for a formula with num_vars
+    decision variables (optionally one that is incremental).
+    """
+    for name, limit in AUTO:
+        entry = REGISTRY[name]
+        if (limit is None or num_vars <= limit) and entry.fits(num_vars) and entry.complete \
+                and (entry.incremental or not incremental):
+            return name
+    for entry in REGISTRY.values():
+        if entry.kind == "cnf" and entry.complete and entry.fits(num_vars) \
+                and (entry.incremental or not incremental):
+            return entry.name
+    raise ValueError(f"No registered solver fits {num_vars} variables")
+
+def run(name, grid, variables, cnf, decision_vars):
+    """
+    Call a registered solver with the arguments of its kind: CNF solvers
+    get (cnf, decision_vars), grid solvers (grid, variables) and build
+    their own formula, if any.
+    """
+    entry = get_solver(name)
+    if entry.kind == "cnf":
+        return entry(cnf, decision_vars)
+    return entry(grid, variables)
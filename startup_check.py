@@ -0,0 +1,58 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules only the modes that use them should import
+LAZY_MODULES = (
+    "pysat.formula", "pysat.solvers", "puzzle_generator", "solver_pysat", "solver_bruteforce",
+    "solver_backtracking", "solver_deduction", "decomposition", "portfolio", "lazy",
+    "model_counter", "backbone", "preprocess", "tiled", "batch",
+)
+
+def import_times(module):
+    """
+    Import `module` in a fresh interpreter under -X importtime.
+
+    Returns: Dictionary module -> (self microseconds, cumulative microseconds)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Check what importing the CLI costs and loads.")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Fail if the import takes longer than this many milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args(argv)
+
+    times = import_times(args.module)
+    total = times[args.module][1] / 1000
+    print(f"import {args.module}: {total:.1f} ms, {len(times)} modules")
+    for name, (own, _) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {own / 1000:7.2f} ms  {name}")
+
+    failed = False
+    loaded = [name for name in LAZY_MODULES if name in times and name != args.module]
+    if loaded:
+        print(f"FAIL: imported eagerly: {', '.join(loaded)}")
+        failed = True
+    if args.budget is not None and total > args.budget:
+        print(f"FAIL: {total:.1f} ms is over the {args.budget:g} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
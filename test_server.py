@@ -0,0 +1,58 @@
+import asyncio
+import json
+import time
+
+import server
+from solvers import REGISTRY, SolverEntry
+from utils import read_input_file
+
+def solver_sleep(grid, variables):
+    # Stands in for a solve that never finishes
+    time.sleep(3600)
+
+def run_service(requests, jobs=1, max_pending=2):
+    """
+    Start a service, send (method, path, payload) requests in order and
+    stop it; ("WAIT", None, seconds) pauses between requests.
+    """
+    async def go():
+        service = server.SolveService(jobs=jobs, max_pending=max_pending)
+        await service.start()
+        try:
+            responses = []
+            for method, path, payload in requests:
+                if method == "WAIT":
+                    await asyncio.sleep(payload)
+                    continue
+                body = json.dumps(payload).encode() if payload is not None else b""
+                responses.append(await service.handle(method, path, body))
+            return responses
+        finally:
+            await service.stop()
+    return asyncio.run(go())
+
+def test_solver_that_does_not_fit_is_rejected():
+    grid = read_input_file("testcases/input_5.txt")
+    (status, response), (_, health) = run_service([
+        ("POST", "/solve", {"grid": grid, "solver": "bruteforce", "timeout": 1}),
+        ("GET", "/health", None),
+    ])
+    assert status == 400
+    assert "bruteforce" in response["error"]
+    assert health["pending"] == 0
+
+def test_timeout_frees_the_worker():
+    REGISTRY["sleep"] = SolverEntry("sleep", "Sleep", "test_server", "solver_sleep", kind="grid")
+    try:
+        responses = run_service([
+            ("POST", "/solve", {"grid": [["1", "_"]], "solver": "sleep", "timeout": 0.3}),
+            ("POST", "/solve", {"grid": [["1", "_"]], "solver": "sleep", "timeout": 0.3}),
+            ("WAIT", None, 0.2),
+            ("GET", "/health", None),
+            ("POST", "/solve", {"grid": [["1", "_"]], "solver": "pysat", "timeout": 5}),
+        ])
+    finally:
+        del REGISTRY["sleep"]
+    assert [status for status, _ in responses] == [504, 504, 200, 200]
+    assert responses[2][1]["pending"] == 0
+    assert responses[3][1] == {"status": "solved", "solution": [["1", "T"]]}
@@ -0,0 +1,39 @@
+import pytest
+
+from cnf_generator import generate_cnf
+from main import SOLVER_MODES, TOOLS, solver_modes
+from solvers import REGISTRY, get_solver, pick_solver, run
+from utils import assign_variables, interpret_model, read_input_file, solver_variables
+
+def traps(grid):
+    return [[cell == "T" for cell in row] for row in grid]
+
+@pytest.mark.parametrize("name", [name for name in REGISTRY if name != "portfolio"])
+def test_registered_solvers_agree_with_the_solution(name):
+    grid = read_input_file("testcases/input_4.txt")
+    variables = assign_variables(grid)
+    cnf = generate_cnf(grid, variables)
+    decision = solver_variables(variables, cnf)
+    if not REGISTRY[name].fits(len(decision)):
+        pytest.skip(f"{name} does not fit {len(decision)} variables")
+    model = run(name, grid, variables, cnf, decision)
+    # The board has one solution; the solution file also fills in the hidden numbers
+    solution = read_input_file("testcases/solution_4.txt")
+    output = interpret_model(grid, variables, model)
+    assert traps(output) == traps(solution)
+
+def test_pick_solver():
+    assert pick_solver(10) == "backtracking"
+    assert pick_solver(200) == "pysat"
+    assert REGISTRY[pick_solver(10, incremental=True)].incremental
+
+def test_unknown_solver():
+    with pytest.raises(ValueError, match="Unknown solver"):
+        get_solver("nope")
+
+def test_menu_keeps_its_numbers():
+    modes = solver_modes()
+    for choice, names in SOLVER_MODES.items():
+        assert modes[choice][1] == names
+    assert not set(modes) & set(TOOLS)
+    assert ["portfolio"] not in [names for _, names in modes.values()]
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from utils import GEM, TRAP, UNKNOWN, read_grid_array, write_output_file
+
+def write(tmp_path, text):
+    path = tmp_path / "input.txt"
+    path.write_text(text)
+    return str(path)
+
+def test_read_grid_array_round_trip(tmp_path):
+    grid = np.array([[1, UNKNOWN, TRAP], [GEM, 0, 8]], dtype=np.int8)
+    path = str(tmp_path / "output.txt")
+    write_output_file(path, grid)
+    assert (read_grid_array(path) == grid).all()
+
+def test_read_grid_array_loose_layout(tmp_path):
+    grid = read_grid_array(write(tmp_path, "1 ,_\r\n\n\t3,4\n\n"))
+    assert grid.tolist() == [[1, UNKNOWN], [3, 4]]
+
+@pytest.mark.parametrize("text", [
+    "1, 2\n3, 4, 5, 6\n",
+    "1, 2, 3\n4, 5\n6\n",
+    "1, 2,\n3, 4, 5\n",
+    "12, 3\n4, 5\n",
+])
+def test_read_grid_array_rejects_ragged_rows(tmp_path, text):
+    with pytest.raises(ValueError, match="rows have different lengths"):
+        read_grid_array(write(tmp_path, text))
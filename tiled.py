@@ -0,0 +1,192 @@
+import os
+
+from pysat.solvers import Solver
+
+from cnf_generator import generate_cnf
+from utils import assign_variables
+
+class _RowWindow:
+    """Rows of an input file parsed lazily, keeping only the rows still needed."""
+    def __init__(self, f):
+        self.lines = iter(f)
+        self.start = 0  # index of rows[0]
+        self.rows = []
+        self.eof = False
+
+    def fetch(self, hi):
+        # Make rows [start, hi) available (fewer at the end of the file)
+        while not self.eof and self.start + len(self.rows) < hi:
+            line = next(self.lines, None)
+            if line is None:
+                self.eof = True
+            elif line.strip():
+                self.rows.append([cell.strip() for cell in line.strip().split(',')])
+
+    def end(self):
+        return self.start + len(self.rows)
+
+    def get(self, lo, hi):
+        return self.rows[lo - self.start:hi - self.start]
+
+    def drop_before(self, lo):
+        if lo > self.start:
+            del self.rows[:lo - self.start]
+            self.start = lo
+
+class _Band:
+    """One solved band: its solver stays alive so it can be re-solved on a seam conflict."""
+    def __init__(self, lo, a, b, grid, variables, solver, assumptions):
+        self.lo = lo  # board row of grid[0]
+        self.a = a    # number rows [a, b) belong to this band
+        self.b = b
+        self.first = 0 if a == 0 else a + 1  # committed cell rows
+        self.last = min(b, lo + len(grid) - 1)
+        self.grid = grid
+        self.variables = variables
+        self.solver = solver
+        self.assumptions = assumptions
+        self.model = None
+
+    def fix_seam(self, seam):
+        # Rows a - 1 and a as committed by the band above
+        self.assumptions = []
+        for (i, j), value in seam.items():
+            var = self.variables[(i - self.lo, j)]
+            self.assumptions.append(var if value else -var)
+
+    def solve(self):
+        if not self.solver.solve(assumptions=self.assumptions):
+            return False
+        self.model = set(lit for lit in self.solver.get_model() if lit > 0)
+        return True
+
+    def value(self, i, j):
+        # Trap status of board cell (i, j); None for a number cell
+        var = self.variables.get((i - self.lo, j))
+        if var is None:
+            return None
+        return var in self.model
+
+    def seam(self):
+        # Assignment of rows b - 1 and b, which the next band takes as fixed
+        seam = {}
+        for i in (self.b - 1, self.b):
+            if self.lo <= i < self.lo + len(self.grid):
+                for j in range(len(self.grid[0])):
+                    value = self.value(i, j)
+                    if value is not None:
+                        seam[(i, j)] = value
+        return seam
+
+    def core_cells(self):
+        # Board cells of the assumptions that made the last solve fail
+        core = self.solver.get_core() or []
+        return [(i + self.lo, j) for i, j in (self.variables.cell(abs(lit)) for lit in core)]
+
+    def block(self, cells):
+        # Forbid the current values of `cells` and look for another model
+        clause = []
+        for i, j in cells:
+            var = self.variables[(i - self.lo, j)]
+            clause.append(-var if self.value(i, j) else var)
+        self.solver.add_clause(clause)
+        return self.solve()
+
+    def rows(self):
+        for i in range(self.first, self.last + 1):
+            row = self.grid[i - self.lo]
+            yield [cell if cell.isdigit() else ('T' if self.value(i, j) else 'G')
+                   for j, cell in enumerate(row)]
+
+    def close(self):
+        self.solver.delete()
+
+def _build_band(window, a, band_rows, overlap, solver_name):
+    window.fetch(a + band_rows + overlap + 1)
+    end = window.end()
+    b = min(a + band_rows, end) if window.eof else a + band_rows
+    lo = max(a - 1, 0)
+    hi = min(b + overlap + 1, end)
+    grid = window.get(lo, hi)
+    variables = assign_variables(grid)
+    numbers = [(i - lo, j) for i in range(a, min(b + overlap, hi)) for j in range(len(grid[0]))
+               if grid[i - lo][j].isdigit()]
+    # Clauses go straight into the solver; the band's CNF is never materialized
+    solver = Solver(name=solver_name)
+    for clause in generate_cnf(grid, variables, cells=numbers, stream=True):
+        solver.add_clause(clause)
+    return _Band(lo, a, b, grid, variables, solver, [])
+
+def solve_tiled(input_path, output_path, band_rows=64, overlap=2, max_retained=8, solver_name="m22"):
+    """
+    Solve a board band by band without building its whole CNF.
+
+    Band k owns the number cells of rows [a, b) and commits the cell rows
+    up to b. Its formula also includes the number cells of the next
+    `overlap` rows as lookahead, and rows a - 1 and a, committed by the band
+    above, enter as assumptions. When a band is unsatisfiable under those
+    assumptions, the failed ones (the solver's core) are blocked in the band
+    above, which is re-solved; if that band has no other model its own core
+    is blocked in the band above it, and so on. Bands beyond the last
+    `max_retained` are written to the output file and released, so memory
+    depends on the band size, not on the board size.
+
+    Returns:
+        True if the board was solved, False if it has no solution (or one
+        would need backtracking past the retained bands); the output file
+        is removed in that case
+    """
+    if band_rows < 2:
+        raise ValueError("band_rows must be at least 2")
+    solved = False
+    stack = []
+    with open(input_path) as f, open(output_path, 'w') as out:
+        window = _RowWindow(f)
+        a = 0
+        retry = None
+        while True:
+            window.fetch(a + 1)
+            if window.eof and a >= window.end():
+                solved = True
+                break
+            band = retry or _build_band(window, a, band_rows, overlap, solver_name)
+            retry = None
+            if stack:
+                band.fix_seam(stack[-1].seam())
+            if band.solve():
+                stack.append(band)
+                if len(stack) > max_retained:
+                    oldest = stack.pop(0)
+                    for row in oldest.rows():
+                        out.write(', '.join(row) + '\n')
+                    oldest.close()
+                window.drop_before(stack[0].lo)
+                a = band.b
+                continue
+
+            # Seam conflict: backtrack through the retained bands
+            cells = band.core_cells()
+            popped = 0
+            while stack and not stack[-1].block(cells):
+                cells = stack[-1].core_cells()
+                stack.pop().close()
+                popped += 1
+            if popped == 0 and stack:
+                # The band above found another seam: retry this band's
+                # solver under it instead of rebuilding the band
+                retry = band
+            else:
+                band.close()
+            if not stack:
+                break
+            a = stack[-1].b
+
+        if solved:
+            for band in stack:
+                for row in band.rows():
+                    out.write(', '.join(row) + '\n')
+    for band in stack:
+        band.close()
+    if not solved:
+        os.remove(output_path)
+    return solved
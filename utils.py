@@ -1,4 +1,6 @@
+from array import array
 
+import numpy as np
 
 def is_clause_satisfied(clause, assignment):
     return any((lit > 0 and assignment.get(abs(lit), False)) or
@@ -25,6 +27,19 @@ def is_partial_cnf_valid(cnf, assignment):
             return False
     return True
 
+# Codes of the int8 grid representation; digits are stored as their value
+UNKNOWN, TRAP, GEM = -1, -2, -3
+
+_CELL_CODES = np.full(256, -128, dtype=np.int8)  # -128 marks an invalid byte
+for _digit in range(10):
+    _CELL_CODES[ord('0') + _digit] = _digit
+_CELL_CODES[ord('_')] = UNKNOWN
+_CELL_CODES[ord('T')] = TRAP
+_CELL_CODES[ord('G')] = GEM
+
+_CELL_CHARS = np.zeros(256, dtype=np.uint8)  # indexed by code & 0xFF
+for _code, _char in [(d, str(d)) for d in range(10)] + [(UNKNOWN, '_'), (TRAP, 'T'), (GEM, 'G')]:
+    _CELL_CHARS[_code & 0xFF] = ord(_char)
 
 # Get valid neighbor coordinates
 def get_neighbors(i, j, rows, cols):
@@ -45,17 +60,151 @@ def read_input_file(filepath):
             grid.append(row)
     return grid
 
+def read_grid_array(filepath):
+    """
+    Read a board in bulk into an int8 NumPy array.
+
+    Digits keep their value; '_', 'T' and 'G' become UNKNOWN, TRAP and GEM.
+    The whole file is parsed with vectorized byte operations instead of
+    splitting and stripping every token, which matters for very large boards.
+    """
+    data = np.fromfile(filepath, dtype=np.uint8)
+    grid = _parse_canonical(data)
+    if grid is None:
+        grid = _parse_general(data, filepath)
+    if (grid == -128).any():
+        raise ValueError(f"{filepath}: unexpected character in grid")
+    return grid
+
+def _parse_canonical(data):
+    # Fast path for files laid out as write_output_file does: "c, c, c\n"
+    width = int(np.argmax(data == ord('\n'))) if data.size else 0
+    if width == 0 or width % 3 != 1 or data.size % (width + 1):
+        return None
+    lines = data.reshape(-1, width + 1)
+    if not ((lines[:, -1] == ord('\n')).all() and (lines[:, 1:width:3] == ord(',')).all()
+            and (lines[:, 2:width:3] == ord(' ')).all()):
+        return None
+    return _CELL_CODES[lines[:, 0:width:3]]
+
+def _parse_general(data, filepath):
+    data = data[(data != ord(' ')) & (data != ord('\t')) & (data != ord('\r'))]
+    # Drop blank lines, including the trailing newline
+    newline = data == ord('\n')
+    blank = newline & np.concatenate(([True], newline[:-1]))
+    data = data[~blank]
+    if data.size and data[-1] == ord('\n'):
+        data = data[:-1]
+    if not data.size:
+        return np.zeros((0, 0), dtype=np.int8)
+
+    newline = data == ord('\n')
+    comma = data == ord(',')
+    rows = int(np.count_nonzero(newline)) + 1
+    cell = ~(comma | newline)
+    cells = data[cell]
+    cols = cells.size // rows
+    # Every line needs cols single-character cells between cols - 1 commas
+    line = np.cumsum(newline) - newline
+    if ((np.bincount(line[cell], minlength=rows) != cols).any()
+            or (np.bincount(line[comma], minlength=rows) != cols - 1).any()):
+        raise ValueError(f"{filepath}: rows have different lengths or multi-character cells")
+    return _CELL_CODES[cells].reshape(rows, cols)
+
+class VariablePool:
+    """
+    Hands out fresh SAT variable IDs.
+
+    Cell variables and the auxiliary variables introduced by cardinality
+    encodings are drawn from the same pool so their IDs never collide.
+    """
+    def __init__(self, top=0):
+        self.top = top
+
+    def new(self):
+        self.top += 1
+        return self.top
+
+    def reserve(self, top):
+        # Mark every ID up to `top` as used (e.g. after an external encoder)
+        self.top = max(self.top, top)
+
+class VariableMap(dict):
+    """
+    Mapping (i, j) -> variable ID with an array-backed reverse lookup.
+
+    Variable IDs are dense, so the row and column of variable `var` sit at
+    index `var` of two flat int arrays instead of in a second dict.
+    """
+    def __init__(self):
+        super().__init__()
+        self.rows = array('i', [-1])
+        self.cols = array('i', [-1])
+
+    def add(self, cell, var):
+        missing = var + 1 - len(self.rows)
+        if missing > 0:
+            self.rows.extend([-1] * missing)
+            self.cols.extend([-1] * missing)
+        self.rows[var], self.cols[var] = cell
+        self[cell] = var
+
+    def add_many(self, rows, cols, first):
+        """Add cells (rows[n], cols[n]) with consecutive variables from `first`."""
+        rows, cols = np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32)
+        missing = first - len(self.rows)
+        if missing > 0:
+            self.rows.extend([-1] * missing)
+            self.cols.extend([-1] * missing)
+        del self.rows[first:], self.cols[first:]
+        self.rows.frombytes(rows.tobytes())
+        self.cols.frombytes(cols.tobytes())
+        self.update(zip(zip(rows.tolist(), cols.tolist()), range(first, first + len(rows))))
+
+    def cell(self, var):
+        """Return the (i, j) cell of a variable, or None for auxiliaries."""
+        if var < len(self.rows) and self.rows[var] >= 0:
+            return self.rows[var], self.cols[var]
+        return None
+
 # Generate variable mapping
-def assign_variables(grid):
-    variables = {}
-    id_counter = 1
+def assign_variables(grid, pool=None, compact=True):
+    """
+    Give a variable to every cell whose content is unknown.
+
+    With compact=True (the default) digit cells get no variable: they are
+    known not to be traps, so the CNF generator folds them in as constants
+    and solvers only search over the '_' cells. compact=False numbers every
+    cell, which lets callers hide or reveal digits later.
+    """
+    if pool is None:
+        pool = VariablePool()
+    variables = VariableMap()
+    if isinstance(grid, np.ndarray):
+        rows, cols = np.nonzero(grid < 0) if compact else np.indices(grid.shape).reshape(2, -1)
+        first = pool.top + 1
+        pool.reserve(pool.top + len(rows))
+        variables.add_many(rows, cols, first)
+        return variables
     for i in range(len(grid)):
         for j in range(len(grid[0])):
-            variables[(i, j)] = id_counter
-            id_counter += 1
+            if compact and grid[i][j].isdigit():
+                continue
+            variables.add((i, j), pool.new())
     return variables
 
+def solver_variables(variables, cnf):
+    """
+    Decision variables a solver has to assign: every cell variable followed by
+    the auxiliary variables the encoder added above them.
+    """
+    ids = list(variables.values())
+    top = max(ids, default=0)
+    return ids + list(range(top + 1, cnf.nv + 1))
+
 def interpret_model(grid, variables, model):
+    if isinstance(grid, np.ndarray):
+        return _interpret_model_array(grid, variables, model)
     result = []
     model_set = set(model)
     for i in range(len(grid)):
@@ -74,12 +223,48 @@ def interpret_model(grid, variables, model):
         result.append(row)
     return result
 
+def _interpret_model_array(grid, variables, model):
+    # int8 grid in, int8 grid out: unknown cells become TRAP or GEM
+    result = grid.copy()
+    result[result < 0] = GEM
+    if isinstance(variables, VariableMap):
+        var_rows = np.frombuffer(variables.rows, dtype=np.int32)
+        var_cols = np.frombuffer(variables.cols, dtype=np.int32)
+        true = np.asarray(model, dtype=np.int64)
+        true = true[(true > 0) & (true < len(var_rows))]
+        true = true[var_rows[true] >= 0]
+        result[var_rows[true], var_cols[true]] = TRAP
+    else:
+        model_set = set(model)
+        for (i, j), var in variables.items():
+            if var in model_set:
+                result[i, j] = TRAP
+    return result
+
 # Print and optionally write the output
 def print_grid(grid):
+    if isinstance(grid, np.ndarray):
+        grid = [[chr(c) for c in row] for row in _CELL_CHARS[grid.view(np.uint8)]]
     for row in grid:
         print(', '.join(row))
 
 def write_output_file(output_path, grid):
+    if isinstance(grid, np.ndarray):
+        _write_grid_array(output_path, grid)
+        return
     with open(output_path, 'w') as f:
         for row in grid:
             f.write(', '.join(row) + '\n')
+
+def _write_grid_array(output_path, grid):
+    # Lay every row out as "c, c, ..., c\n" in one byte matrix and write it
+    rows, cols = grid.shape
+    if not cols:
+        open(output_path, 'w').close()
+        return
+    out = np.full((rows, 3 * cols - 1), ord(' '), dtype=np.uint8)
+    out[:, 0::3] = _CELL_CHARS[grid.view(np.uint8)]
+    out[:, 1::3] = ord(',')
+    out[:, -1] = ord('\n')
+    with open(output_path, 'wb') as f:
+        f.write(out.tobytes())